@@ -0,0 +1,42 @@
+import numpy as np
+from 颜色映射 import wavelength_to_hex
+
+
+def wavelength2hex(waveLength):
+    # 原来 单分子双缝干涉实验.wavelength2Hex 的逐点分段计算，作为对照
+    if 380 <= waveLength <= 440:
+        attenuation = 0.3 + 0.7 * (waveLength - 380) / (440 - 380)
+        r, g, b = ((-(waveLength - 440) / (440 - 380)) * attenuation) ** 0.8, 0.0, (1.0 * attenuation) ** 0.8
+    elif 440 <= waveLength <= 490:
+        r, g, b = 0.0, ((waveLength - 440) / (490 - 440)) ** 0.8, 1.0
+    elif 490 <= waveLength <= 510:
+        r, g, b = 0.0, 1.0, (-(waveLength - 510) / (510 - 490)) ** 0.8
+    elif 510 <= waveLength <= 580:
+        r, g, b = ((waveLength - 510) / (580 - 510)) ** 0.8, 1.0, 0.0
+    elif 580 <= waveLength <= 645:
+        r, g, b = 1.0, (-(waveLength - 645) / (645 - 580)) ** 0.8, 0.0
+    elif 645 <= waveLength <= 780:
+        attenuation = 0.3 + 0.7 * (750 - waveLength) / (750 - 645)
+        r, g, b = 1.0 * attenuation, 0.0, 0.0
+    else:
+        r, g, b = 0.0, 0.0, 0.0
+    return f'#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}'
+
+
+def test_random_wavelengths_match_scalar_formula():
+    wavelengths = np.random.default_rng(0).uniform(370, 790, 20000)
+    expected = [wavelength2hex(w) for w in wavelengths]
+    assert list(wavelength_to_hex(wavelengths)) == expected
+
+
+def test_grid_wavelengths_match_scalar_formula():
+    wavelengths = np.round(np.arange(3700, 7901) * 0.1, 1)
+    expected = [wavelength2hex(w) for w in wavelengths]
+    assert list(wavelength_to_hex(wavelengths)) == expected
+
+
+def test_band_edges_are_black():
+    for w in (379.96, 780.04, 300.0, 900.0):
+        assert wavelength_to_hex(w) == wavelength2hex(w) == '#000000'
+    assert wavelength_to_hex(380.0) == wavelength2hex(380.0)
+    assert wavelength_to_hex(780.0) == wavelength2hex(780.0)
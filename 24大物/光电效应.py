@@ -7,6 +7,7 @@ from PyQt5.QtGui import QPixmap, QFont
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.animation import FuncAnimation
+import 性能诊断
 
 # 载入黑体字体以支持中文显示
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置默认字体为黑体
@@ -22,6 +23,7 @@ m = 9.109e-31  # 电子质量 (kg)
 work_function_data = {"铜": 4.7, "铝": 4.2, "金": 5.1, "银": 4.26, "锌": 4.33}
 
 class PhotoelectricEffectSimulator(QMainWindow):
+    @性能诊断.timed_init("光电效应")
     def __init__(self):
         super().__init__()
 
@@ -71,7 +73,7 @@ class PhotoelectricEffectSimulator(QMainWindow):
         # 获取图片路径并设置固定大小
         current_dir = os.path.dirname(os.path.abspath(__file__))
         image_path = os.path.join(current_dir, '光电效应.png')
-        pixmap = QPixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)  # 设置图片大小
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)  # 设置图片大小
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
 
@@ -98,6 +100,7 @@ class PhotoelectricEffectSimulator(QMainWindow):
         self.figure, self.axs = plt.subplots(2, 1, figsize=(10, 12))  # 2 行 1 列的布局，并将高度调整为12
         self.figure.subplots_adjust(hspace=0.5)  # 调整上下图之间的距离（hspace参数设置图形的上下间距）
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "光电效应")
         middle_layout.addWidget(self.canvas)
 
         # 右侧布局：参数设置（材料 + 计算结果）和保存区
@@ -3,11 +3,18 @@
 import sys
 import numpy as np
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableWidget, QTableWidgetItem, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableView, QMessageBox
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPixmap, QMovie
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from 数据表格 import ArrayTableModel
+from 数据导出 import save_columns
+from 普朗克拟合 import (NOISE_AMPLITUDE, CONFIDENCE_LEVEL, OnlinePlanckFit, stopping_voltages, fit_planck, format_fit,
+                   confidence_factor, monte_carlo)
+from 测量记录 import DecimatedHistory
+from 刷新调度 import FrameWorker
+import 性能诊断
 
 # 载入黑体字体以支持中文显示
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置默认字体为黑体
@@ -21,7 +28,23 @@ c = 3.0e8           # 光速 (m/s)
 # 金属逸出功数据 (单位: eV)
 work_function_data = {"铜": 4.7, "铝": 4.2, "金": 5.1, "银": 4.26, "锌": 4.33}
 
+# 图中每次计算最多画出的数据点数，点更多时等间隔抽取；拟合始终使用全部数据
+PLOT_POINTS = 5000
+
+# 流式采集：每批的数据点数和两批之间的间隔（毫秒）
+STREAM_BATCH = 200
+STREAM_INTERVAL_MS = 100
+
+# 重复实验结果直方图的分组数
+HISTOGRAM_BINS = 50
+
+
+def compute_monte_carlo(metal, frequencies, experiments):
+    # 在后台线程中执行重复实验，返回 (金属种类, MonteCarloResult)
+    return metal, monte_carlo(frequencies, work_function_data[metal], experiments, NOISE_AMPLITUDE, h_true)
+
 class PlanckConstantSimulator(QMainWindow):
+    @性能诊断.timed_init("光电效应测普朗克常量")
     def __init__(self):
         super().__init__()
 
@@ -81,7 +104,7 @@ class PlanckConstantSimulator(QMainWindow):
         # 加载示意图
         current_dir = os.path.dirname(os.path.abspath(__file__))
         image_path = os.path.join(current_dir, '光电效应.png')
-        pixmap = QPixmap(image_path).scaled(400, 300, Qt.KeepAspectRatio)
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(400, 300, Qt.KeepAspectRatio)
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
         left_layout.addWidget(self.principle_img)
@@ -102,8 +125,11 @@ class PlanckConstantSimulator(QMainWindow):
         middle_layout.addWidget(result_label)
 
         # 增加仿真图高度
-        self.figure, self.axs = plt.subplots(1, 1, figsize=(6, 10))  # 调整图像尺寸，使仿真结果图更高
+        # 上方为数据点和拟合直线，下方为拟合残差（重复实验时分别为 h 和逸出功的直方图）
+        self.figure, (self.axs, self.residual_axs) = plt.subplots(
+            2, 1, figsize=(6, 10), gridspec_kw={"height_ratios": [3, 1]})  # 调整图像尺寸，使仿真结果图更高
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "光电效应测普朗克常量")
         middle_layout.addWidget(self.canvas)
 
         # 右侧布局：参数输入区 + 数据区 + 处理区
@@ -155,6 +181,14 @@ class PlanckConstantSimulator(QMainWindow):
         self.metal_combo.setStyleSheet("font-size: 18px; padding: 10px;")
         grid_layout.addWidget(self.metal_combo, 3, 1)
 
+        # 重复实验次数
+        self.experiments_label = QLabel("重复实验次数:")
+        self.experiments_label.setStyleSheet("font-size: 18px; padding: 10px;")
+        grid_layout.addWidget(self.experiments_label, 4, 0)
+        self.experiments_input = QLineEdit("1000")
+        self.experiments_input.setStyleSheet("font-size: 18px; padding: 10px;")
+        grid_layout.addWidget(self.experiments_input, 4, 1)
+
         # 数据区：表格
         data_table_layout = QVBoxLayout()
         right_layout.addLayout(data_table_layout)
@@ -164,10 +198,10 @@ class PlanckConstantSimulator(QMainWindow):
         data_table_title.setStyleSheet("font-size: 24px; font-weight: bold; border: 2px solid #7f8c8d; padding: 10px; background-color: #b3cde0;")
         data_table_layout.addWidget(data_table_title)
 
-        # 初始化数据表格时不预先设置行数
-        self.data_table = QTableWidget()
-        self.data_table.setColumnCount(2)
-        self.data_table.setHorizontalHeaderLabels(["光频率 (THz)", "遏止电压 (V)"])
+        # 初始化数据表格时不预先设置行数；数据保存在 numpy 列数组中，表格只格式化可见的行
+        self.table_model = ArrayTableModel(["光频率 (THz)", "遏止电压 (V)"], ["%.2f", "%.2f"], parent=self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.table_model)
         data_table_layout.addWidget(self.data_table)
 
         # 处理区：计算、清除、保存按钮
@@ -184,6 +218,14 @@ class PlanckConstantSimulator(QMainWindow):
         self.calculate_button.clicked.connect(self.calculate_results)
         process_layout.addWidget(self.calculate_button)
 
+        # 流式采集：数据按批加入，每批之后更新 h 的估计值和置信区间
+        self.stream_button = QPushButton("流式采集")
+        self.stream_button.setStyleSheet("font-size: 24px; background-color: #007bff; color: white;")
+        self.stream_button.clicked.connect(self.toggle_stream)
+        process_layout.addWidget(self.stream_button)
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.acquire_batch)
+
         self.clear_button = QPushButton("清除数据")
         self.clear_button.setStyleSheet("font-size: 24px; background-color: #dc3545; color: white;")
         self.clear_button.clicked.connect(self.clear_data)
@@ -200,11 +242,27 @@ class PlanckConstantSimulator(QMainWindow):
         self.save_data_button.clicked.connect(self.save_data)
         process_layout.addWidget(self.save_data_button)
 
-        # 数据存储
-        self.frequency_data = []
-        self.stopping_voltage_data = []
+        # 重复实验：同样的频率和扰动幅度做多次独立实验，统计拟合结果的分布
+        self.monte_carlo_button = QPushButton("重复实验")
+        self.monte_carlo_button.setStyleSheet("font-size: 24px; background-color: #007bff; color: white;")
+        self.monte_carlo_button.clicked.connect(self.run_monte_carlo)
+        process_layout.addWidget(self.monte_carlo_button)
+        # 重复实验在后台线程中计算，窗口不会卡住，算完后再画直方图
+        self.monte_carlo_worker = FrameWorker(compute_monte_carlo, "光电效应测普朗克常量/重复实验", parent=self)
+        self.monte_carlo_worker.frame_ready.connect(self.finish_monte_carlo)
+        self.monte_carlo_worker.frame_failed.connect(self.fail_monte_carlo)
+
+        self.save_monte_carlo_button = QPushButton("保存重复实验结果")
+        self.save_monte_carlo_button.setStyleSheet("font-size: 24px; background-color: #007bff; color: white;")
+        self.save_monte_carlo_button.clicked.connect(self.save_monte_carlo)
+        process_layout.addWidget(self.save_monte_carlo_button)
+
+        # 数据存储：每次计算的 (金属种类, 频率数组, 遏止电压数组, 拟合结果)，以及最近一次重复实验的结果
+        self.runs = []
+        self.monte_carlo_result = None
 
     def calculate_results(self):
+        self.stop_stream()
         # 获取输入的最低频率、最高频率和间距
         try:
             min_freq = float(self.min_freq_input.text())
@@ -213,63 +271,210 @@ class PlanckConstantSimulator(QMainWindow):
         except ValueError:
             QMessageBox.warning(self, "输入错误", "请确保频率和间距的输入值有效！")
             return
+        if min_freq >= max_freq:
+            QMessageBox.warning(self, "输入错误", "最低光频率必须小于最高光频率！")
+            return
+        if interval < 2:
+            QMessageBox.warning(self, "输入错误", "拟合至少需要两个不同的频率！")
+            return
 
         # 获取用户选择的金属种类
         selected_metal = self.metal_combo.currentText()
         work_function_eV = work_function_data[selected_metal]  # 根据选择的金属种类获取逸出功
-        work_function_J = work_function_eV * e
 
         # 生成频率范围
         frequencies = np.linspace(min_freq, max_freq, interval)
 
-        # 清空现有数据，以便新数据从第一行开始
-        self.data_table.setRowCount(0)  # 确保从第一行开始
-
-        # 设定随机扰动的幅度，比如0.1V的上下波动
-        noise_amplitude = 0.1
-
-        for freq_THz in frequencies:
-            frequency_Hz = freq_THz * 1e12  # 转换为 Hz
-
-            # 计算无扰动的遏止电压
-            stopping_voltage = (h_true * frequency_Hz - work_function_J) / e
-
-            # 引入随机扰动，确保斜率不变
-            noise = np.random.uniform(-noise_amplitude, noise_amplitude)
-            stopping_voltage_with_noise = stopping_voltage + noise
+        # 整个频率序列连同随机扰动一次生成（扰动不改变斜率），再用最小二乘拟合 h 和逸出功
+        voltages = stopping_voltages(frequencies, work_function_eV, NOISE_AMPLITUDE, h_true)
+        fit = fit_planck(frequencies, voltages)
+        self.runs.append((selected_metal, frequencies, voltages, fit))
 
-            # 在表格中显示结果
-            row_position = self.data_table.rowCount()
-            self.data_table.insertRow(row_position)
-            self.data_table.setItem(row_position, 0, QTableWidgetItem(f"{freq_THz:.2f}"))
-            self.data_table.setItem(row_position, 1, QTableWidgetItem(f"{stopping_voltage_with_noise:.2f}"))
-
-            # 保存数据
-            self.frequency_data.append(freq_THz)
-            self.stopping_voltage_data.append(stopping_voltage_with_noise)
+        # 整批结果一次写入表格
+        self.table_model.replace(frequencies, voltages)
 
         # 更新实验结果图形
         self.update_plot()
 
     def update_plot(self):
         self.axs.clear()
-
-        # 绘制频率 vs 遏止电压的关系，只保留数据点，不显示拟合曲线
-        self.axs.scatter(self.frequency_data, self.stopping_voltage_data, color='b', label="实验数据")
+        self.residual_axs.clear()
+
+        # 绘制频率 vs 遏止电压的关系和拟合直线，每次计算用一种颜色；点数很多时只画等间隔抽取的点
+        for metal, frequencies, voltages, fit in self.runs:
+            step = max(1, len(frequencies) // PLOT_POINTS)
+            points, = self.axs.plot(frequencies[::step], voltages[::step], '.', label=f"{metal} 实验数据")
+            ends = frequencies[[0, -1]]
+            self.axs.plot(ends, fit.intercept + fit.slope * ends, '-', color=points.get_color(), label=format_fit(fit))
+            self.residual_axs.plot(frequencies[::step], fit.residuals[::step], '.', markersize=2, color=points.get_color())
         self.axs.set_title("频率与遏止电压的关系", fontsize=20)
-        self.axs.set_xlabel("频率 (THz)", fontsize=18)
         self.axs.set_ylabel("遏止电压 (V)", fontsize=18)
+        self.residual_axs.axhline(0, color='gray', linewidth=1)
+        self.residual_axs.set_xlabel("频率 (THz)", fontsize=18)
+        self.residual_axs.set_ylabel("残差 (V)", fontsize=18)
 
-        self.axs.legend()
+        if self.runs:
+            self.axs.legend(fontsize=9)
         self.canvas.draw()
 
     def clear_data(self):
-        self.data_table.clearContents()
-        self.frequency_data.clear()
-        self.stopping_voltage_data.clear()
+        self.stop_stream()
+        self.table_model.clear()
+        self.runs.clear()
+        self.axs.clear()
+        self.residual_axs.clear()
+        self.canvas.draw()
+
+    def toggle_stream(self):
+        if self.stream_timer.isActive():
+            self.stop_stream()
+        else:
+            self.start_stream()
+
+    def start_stream(self):
+        try:
+            min_freq = float(self.min_freq_input.text())
+            max_freq = float(self.max_freq_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "请确保频率和间距的输入值有效！")
+            return
+        if min_freq >= max_freq:
+            QMessageBox.warning(self, "输入错误", "最低光频率必须小于最高光频率！")
+            return
+        self.stream_range = (min_freq, max_freq)
+        self.stream_work_function = work_function_data[self.metal_combo.currentText()]
+        self.stream_rng = np.random.default_rng()
+        # 估计量只保存几个累计和；画收敛曲线用的历史记录按对数间隔抽稀，行数有上限
+        self.stream_fit = OnlinePlanckFit()
+        self.stream_history = DecimatedHistory(["数据点数", "h (J·s)", "置信区间半宽 (J·s)"])
+
+        # 上图：h 的估计值和置信区间随数据点数的变化；下图：置信区间半宽
         self.axs.clear()
+        self.residual_axs.clear()
+        self.stream_line, = self.axs.plot([], [], '-', label="h 的估计值")
+        self.stream_band = self.axs.fill_between([], [], [], color=self.stream_line.get_color(), alpha=0.3)
+        self.axs.axhline(h_true * 1e34, color='gray', linestyle='--', label="h 的真实值")
+        self.stream_text = self.axs.text(0.02, 0.02, "", transform=self.axs.transAxes, fontsize=10)
+        self.width_line, = self.residual_axs.plot([], [], '-', color=self.stream_line.get_color())
+        self.axs.set_xscale('log')
+        self.residual_axs.set_xscale('log')
+        self.residual_axs.set_yscale('log')
+        self.axs.set_title(f"流式拟合：h 与 {CONFIDENCE_LEVEL:.0%} 置信区间", fontsize=20)
+        self.axs.set_ylabel("h ($10^{-34}$ J·s)", fontsize=18)
+        self.residual_axs.set_xlabel("数据点数", fontsize=18)
+        self.residual_axs.set_ylabel("区间半宽", fontsize=18)
+        self.axs.legend()
+
+        self.stream_button.setText("停止采集")
+        self.stream_timer.start(STREAM_INTERVAL_MS)
+
+    def stop_stream(self):
+        self.stream_timer.stop()
+        self.stream_button.setText("流式采集")
+
+    def closeEvent(self, event):
+        # 窗口关闭后仍保留在窗口池中，停止流式采集，免得计时器在后台继续触发
+        self.stop_stream()
+        super().closeEvent(event)
+
+    def acquire_batch(self):
+        # 模拟采集一批随机频率上的数据，只做 O(1) 的累计和更新，不对历史数据重新拟合
+        low, high = self.stream_range
+        frequencies = self.stream_rng.uniform(low, high, STREAM_BATCH)
+        voltages = stopping_voltages(frequencies, self.stream_work_function, NOISE_AMPLITUDE, h_true, self.stream_rng)
+        self.stream_fit.update(frequencies, voltages)
+        fit = self.stream_fit.fit()
+        if fit is None or self.stream_fit.n <= 2:
+            return
+        half_width = confidence_factor(self.stream_fit.n) * fit.h_error
+        self.stream_history.append(self.stream_fit.n, fit.h, half_width)
+        self.update_stream_plot(fit)
+
+    def update_stream_plot(self, fit):
+        counts, estimates, half_widths = [column * scale for column, scale in zip(self.stream_history.columns(), (1, 1e34, 1e34))]
+        self.stream_line.set_data(counts, estimates)
+        lower = estimates - half_widths
+        upper = estimates + half_widths
+        # 直接替换置信带多边形的顶点，不重新创建图元
+        self.stream_band.set_verts([np.column_stack([np.concatenate([counts, counts[::-1]]),
+                                                     np.concatenate([lower, upper[::-1]])])])
+        self.width_line.set_data(counts, half_widths)
+        self.stream_text.set_text(f"n = {self.stream_fit.n}\n{format_fit(fit)}")
+        # 坐标范围包含整个置信区间，能看到区间随数据点数收窄
+        if len(counts) > 1:
+            self.axs.set_xlim(counts[0], counts[-1])
+            self.residual_axs.set_xlim(counts[0], counts[-1])
+            self.axs.set_ylim(min(lower.min(), h_true * 1e34), max(upper.max(), h_true * 1e34))
+            self.residual_axs.set_ylim(half_widths.min() / 1.2, half_widths.max() * 1.2)
+        self.canvas.draw_idle()
+
+    def run_monte_carlo(self):
+        self.stop_stream()
+        try:
+            min_freq = float(self.min_freq_input.text())
+            max_freq = float(self.max_freq_input.text())
+            interval = int(self.interval_input.text())
+            experiments = int(self.experiments_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "请确保频率、间距和重复实验次数的输入值有效！")
+            return
+        if min_freq >= max_freq:
+            QMessageBox.warning(self, "输入错误", "最低光频率必须小于最高光频率！")
+            return
+        if interval < 3 or experiments < 1:
+            QMessageBox.warning(self, "输入错误", "重复实验至少需要三个不同的频率和一次实验！")
+            return
+        metal = self.metal_combo.currentText()
+        frequencies = np.linspace(min_freq, max_freq, interval)
+
+        # 噪声矩阵分块生成、批量拟合，实验次数很多时分块交给进程池；计算期间按钮不可用
+        self.monte_carlo_button.setEnabled(False)
+        self.monte_carlo_button.setText("重复实验中…")
+        self.monte_carlo_worker.submit(metal, frequencies, experiments)
+
+    def finish_monte_carlo(self, outcome):
+        metal, result = outcome
+        self.reset_monte_carlo_button()
+        self.monte_carlo_result = result
+        self.plot_monte_carlo(metal, result)
+
+    def fail_monte_carlo(self, exc):
+        self.reset_monte_carlo_button()
+        QMessageBox.warning(self, "错误", f"重复实验失败：{exc}")
+
+    def reset_monte_carlo_button(self):
+        self.monte_carlo_button.setEnabled(True)
+        self.monte_carlo_button.setText("重复实验")
+
+    def plot_monte_carlo(self, metal, result):
+        self.axs.clear()
+        self.residual_axs.clear()
+        for ax, values, errors, truth, scale, unit in (
+                (self.axs, result.h, result.h_error, h_true, 1e34, "$\\times10^{-34}$ J·s"),
+                (self.residual_axs, result.work_function, result.work_function_error,
+                 work_function_data[metal], 1, "eV")):
+            ax.hist(values * scale, bins=HISTOGRAM_BINS, alpha=0.7)
+            ax.axvline(truth * scale, color='gray', linestyle='--')
+            # 各次拟合值的标准差应与单次拟合给出的标准误差相当
+            ax.text(0.02, 0.95, f"mean = {values.mean() * scale:.4f} {unit}\nstd = {values.std() * scale:.4f}\n"
+                                f"mean SE = {errors.mean() * scale:.4f}",
+                    transform=ax.transAxes, va='top', fontsize=10)
+        self.axs.set_title(f"{metal}：{len(result.h)} 次重复实验", fontsize=20)
+        self.axs.set_xlabel("h ($10^{-34}$ J·s)", fontsize=14)
+        self.axs.set_ylabel("次数", fontsize=18)
+        self.residual_axs.set_xlabel("逸出功 (eV)", fontsize=14)
+        self.residual_axs.set_ylabel("次数", fontsize=18)
         self.canvas.draw()
 
+    def save_monte_carlo(self):
+        if self.monte_carlo_result is None:
+            return
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getSaveFileName(self, "保存重复实验结果", "", "Text Files (*.txt);;CSV Files (*.csv);;NumPy Files (*.npz);;All Files (*)", options=options)
+        if file_name:
+            save_columns(file_name, ["h (J·s)", "h 标准误差 (J·s)", "逸出功 (eV)", "逸出功标准误差 (eV)"],
+                         self.monte_carlo_result, ["%.6e", "%.6e", "%.6f", "%.6f"])
+
     def save_image(self):
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(self, "保存图像", "", "PNG Files (*.png);;JPEG Files (*.jpg);;All Files (*)", options=options)
@@ -280,11 +485,10 @@ class PlanckConstantSimulator(QMainWindow):
     def save_data(self):
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(self, "保存数据", "", "Text Files (*.txt);;CSV Files (*.csv);;All Files (*)", options=options)
-        if file_name:
-            with open(file_name, 'w') as file:
-                file.write("光频率 (THz), 遏止电压 (V)\n")
-                for freq, voltage in zip(self.frequency_data, self.stopping_voltage_data):
-                    file.write(f"{freq:.2f}, {voltage:.2f}\n")
+        if file_name and self.runs:
+            # 所有计算的数据连同各自的拟合残差一次批量写出
+            columns = [np.concatenate(arrays) for arrays in zip(*[(f, v, fit.residuals) for _, f, v, fit in self.runs])]
+            save_columns(file_name, ["光频率 (THz)", "遏止电压 (V)", "拟合残差 (V)"], columns, ["%.2f", "%.2f", "%.4f"])
 
     # 显示GIF动图
     def show_gif(self):
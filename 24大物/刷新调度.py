@@ -0,0 +1,401 @@
+import time
+import logging
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QObject, QTimer, QThreadPool, QRunnable, pyqtSignal
+import 性能诊断
+
+logger = logging.getLogger(__name__)
+
+# 滑块拖动时的最高刷新帧率
+MAX_FPS = 30
+
+# 帧缓存的内存上限（字节）
+FRAME_CACHE_BYTES = 64 * 1024 * 1024
+
+# 交互期间的降采样倍数：网格每边的点数除以该值
+COARSE_FACTOR = 4
+
+# 输入停止多久（毫秒）后补画一帧全分辨率图像
+IDLE_MS = 250
+
+# 两次参数变化的间隔小于该值（毫秒）时视为快速变化
+FAST_CHANGE_MS = 150
+
+# 降采样后网格每边至少保留的点数
+MIN_COARSE_N = 32
+
+# 按显示分辨率渲染时，网格每边点数的上下限
+MIN_DISPLAY_N = 64
+MAX_DISPLAY_N = 2048
+
+
+class FrameScheduler(QObject):
+    """
+    合并参数变化的刷新调度器。
+
+    把 QSlider.valueChanged 等信号连接到 request()，短时间内的多次变化只会触发
+    一次 render()；两次渲染之间至少间隔 1/max_fps 秒，中间被合并掉的帧计为丢弃。
+    render() 应当读取控件的当前值，因此每次渲染的都是最新状态。直接调用 flush()
+    而没有待渲染的请求时照常渲染，但不计入 rendered。
+    """
+
+    def __init__(self, render, name, max_fps=MAX_FPS, parent=None):
+        super().__init__(parent)
+        self.render = render
+        self.name = name
+        self.interval = 1.0 / max_fps
+        self.requested = 0
+        self.rendered = 0
+        self.pending = False
+        self.last_render = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    @property
+    def dropped(self):
+        return max(0, self.requested - self.rendered)
+
+    def set_max_fps(self, max_fps):
+        self.interval = 1.0 / max_fps
+
+    def request(self, *args):
+        """登记一次参数变化；已有待渲染的帧时直接合并。"""
+        self.requested += 1
+        self.pending = True
+        if self.timer.isActive():
+            return
+        wait = self.interval - (time.perf_counter() - self.last_render)
+        self.timer.start(max(0, int(wait * 1000)))
+
+    def flush(self):
+        """立即渲染当前状态。"""
+        self.timer.stop()
+        self.last_render = time.perf_counter()
+        pending, self.pending = self.pending, False
+        self.render()
+        if pending:
+            self.rendered += 1
+        性能诊断.set_counters(self.name, self.stats())
+
+    def stats(self):
+        return {"requested": self.requested, "rendered": self.rendered, "dropped": self.dropped}
+
+
+class LevelOfDetail(QObject):
+    """
+    交互期间降低网格分辨率的细节层次控制器。
+
+    拖动滑块期间（attach 之后）或参数在 fast_change_ms 内连续变化时进入粗略模式，
+    grid_size(N) 返回 N // coarse_factor；松开滑块或输入停止 idle_ms 之后回到
+    全分辨率，并调用 refine() 补画一帧。低配置的电脑上可以调大 coarse_factor
+    或 idle_ms，coarse_factor 设为 1 则关闭降采样。
+    """
+
+    def __init__(self, refine, name, coarse_factor=COARSE_FACTOR, idle_ms=IDLE_MS,
+                 fast_change_ms=FAST_CHANGE_MS, parent=None):
+        super().__init__(parent)
+        self.refine = refine
+        self.name = name
+        self.coarse_factor = coarse_factor
+        self.idle_ms = idle_ms
+        self.fast_change_ms = fast_change_ms
+        self.coarse = False
+        self.dragging = False
+        self.last_change = None
+        self.refined = 0
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.settle)
+
+    def set_thresholds(self, coarse_factor=None, idle_ms=None, fast_change_ms=None):
+        if coarse_factor is not None:
+            self.coarse_factor = coarse_factor
+        if idle_ms is not None:
+            self.idle_ms = idle_ms
+        if fast_change_ms is not None:
+            self.fast_change_ms = fast_change_ms
+
+    def attach(self, slider):
+        """跟踪滑块的按下、拖动和松开。"""
+        slider.sliderPressed.connect(self.press)
+        slider.sliderReleased.connect(self.release)
+        slider.valueChanged.connect(self.touch)
+
+    def press(self):
+        self.dragging = True
+        self.coarse = self.coarse_factor > 1
+
+    def release(self):
+        self.dragging = False
+        self.settle()
+
+    def touch(self, *args):
+        """登记一次参数变化，应在对应的渲染请求之前调用。"""
+        now = time.perf_counter()
+        fast = self.last_change is not None and (now - self.last_change) * 1000 < self.fast_change_ms
+        self.last_change = now
+        if self.dragging or fast:
+            self.coarse = self.coarse_factor > 1
+        self.idle_timer.start(self.idle_ms)
+
+    def settle(self):
+        """输入已停止：回到全分辨率，之前是粗略帧时补画一帧。"""
+        self.idle_timer.stop()
+        if not self.coarse:
+            return
+        self.coarse = False
+        self.refined += 1
+        性能诊断.set_counters(self.name, self.stats())
+        self.refine()
+
+    def grid_size(self, N):
+        """当前应使用的网格每边点数。"""
+        if not self.coarse or self.coarse_factor <= 1:
+            return N
+        return max(min(N, MIN_COARSE_N), N // self.coarse_factor)
+
+    def stats(self):
+        return {"coarse_factor": self.coarse_factor, "idle_ms": self.idle_ms, "refined": self.refined}
+
+
+def display_grid_size(ax):
+    """
+    返回坐标轴在屏幕上实际占用的物理像素数（宽、高中较小的一边），用作干涉图网格每边的点数。
+
+    Qt 后端会把设备像素比（高分屏缩放）乘进 figure.dpi，因此坐标轴的窗口范围已经是物理像素；
+    结果限制在 [MIN_DISPLAY_N, MAX_DISPLAY_N] 之间。
+    """
+    bbox = ax.get_window_extent()
+    return int(min(max(round(min(bbox.width, bbox.height)), MIN_DISPLAY_N), MAX_DISPLAY_N))
+
+
+class DisplayResolution:
+    """
+    跟踪干涉图坐标轴的物理像素尺寸。
+
+    size 是当前的网格每边点数；画布缩放（包括移到设备像素比不同的屏幕上）使尺寸改变时
+    调用 on_change()，尺寸不变的 resize 事件不会触发重新渲染。
+    """
+
+    def __init__(self, canvas, ax, on_change):
+        self.ax = ax
+        self.on_change = on_change
+        self.size = display_grid_size(ax)
+        canvas.mpl_connect('resize_event', self._on_resize)
+
+    def _on_resize(self, event):
+        size = display_grid_size(self.ax)
+        if size != self.size:
+            self.size = size
+            self.on_change()
+
+
+class FramePlayer(QObject):
+    """
+    按固定帧率播放帧生成器。
+
+    frames 是一个生成器（或任意迭代器），第 k 个元素对应模拟时间 k / fps 秒，
+    生成器只负责给出参数，show(frame) 负责渲染。计时器按 fps 触发，每次先根据
+    实际经过的时间跳到应当显示的帧，渲染跟不上时中间的帧直接丢弃，
+    模拟时间始终与真实时间同步，不会变慢。生成器结束时发出 finished。
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self, show, name, fps=MAX_FPS, parent=None):
+        super().__init__(parent)
+        self.show = show
+        self.name = name
+        self.fps = fps
+        self.frames = None
+        self.started = 0.0
+        self.index = -1
+        self.played = 0
+        self.dropped = 0
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+    def is_playing(self):
+        return self.frames is not None
+
+    def play(self, frames):
+        self.frames = iter(frames)
+        self.started = time.perf_counter()
+        self.index = -1
+        self.timer.start(max(1, int(1000 / self.fps)))
+        self._tick()
+
+    def stop(self):
+        self.timer.stop()
+        self.frames = None
+
+    def _tick(self):
+        if self.frames is None:
+            return
+        target = int((time.perf_counter() - self.started) * self.fps)
+        frame = None
+        skipped = 0
+        try:
+            while self.index < target:
+                if frame is not None:
+                    skipped += 1
+                frame = next(self.frames)
+                self.index += 1
+        except StopIteration:
+            self.stop()
+        self.dropped += skipped
+        if frame is not None:
+            self.played += 1
+            self.show(frame)
+        性能诊断.set_counters(self.name, self.stats())
+        if self.frames is None:
+            self.finished.emit()
+
+    def stats(self):
+        return {"played": self.played, "dropped": self.dropped}
+
+
+class _FrameSignals(QObject):
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
+
+
+class _FrameTask(QRunnable):
+    def __init__(self, worker, serial, args):
+        super().__init__()
+        self.worker = worker
+        self.serial = serial
+        self.args = args
+        self.signals = worker.signals
+
+    def run(self):
+        # 开始计算前已经有更新的帧提交时直接放弃
+        if self.serial < self.worker.serial:
+            return
+        try:
+            result = self.worker.compute(*self.args)
+        except Exception as exc:
+            # 异常不能跨线程抛出，交给主线程处理，这一帧丢弃
+            signal, result = self.signals.failed, exc
+        else:
+            signal = self.signals.finished
+        try:
+            signal.emit(self.serial, result)
+        except RuntimeError:
+            # 窗口已经关闭，信号对象已被销毁
+            pass
+
+
+class FrameWorker(QObject):
+    """
+    在后台线程中计算帧数据。
+
+    compute(*args) 在线程池中执行，应只做 numpy 计算（numpy 的大数组运算会释放 GIL），
+    返回的数组通过 frame_ready 信号交回主线程，主线程只需替换图像数据。
+    线程池只有一个线程；提交新帧时，尚未开始的旧帧会被取消，
+    已经算完但比当前显示的帧更旧的结果也会被丢弃。compute 抛出的异常在主线程中
+    记入日志并通过 frame_failed 信号发出，这一帧不显示。
+    """
+
+    frame_ready = pyqtSignal(object)
+    frame_failed = pyqtSignal(object)
+
+    def __init__(self, compute, name, parent=None):
+        super().__init__(parent)
+        self.compute = compute
+        self.name = name
+        self.serial = 0
+        self.shown = 0
+        self.submitted = 0
+        self.delivered = 0
+        self.failed = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _FrameSignals(self)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+    def submit(self, *args):
+        """提交一帧，取消排队中尚未开始的旧帧。"""
+        self.serial += 1
+        self.submitted += 1
+        self.pool.clear()
+        self.pool.start(_FrameTask(self, self.serial, args))
+
+    def skip(self):
+        """当前帧已有现成结果（如来自帧缓存）时调用：取消排队的帧，并丢弃之后送达的旧结果。"""
+        self.serial += 1
+        self.shown = self.serial
+        self.pool.clear()
+
+    def wait(self, msecs=-1):
+        """等待已提交的帧计算完成（结果仍通过事件循环送达）。"""
+        return self.pool.waitForDone(msecs)
+
+    def _on_finished(self, serial, result):
+        if serial <= self.shown:
+            return
+        self.shown = serial
+        self.delivered += 1
+        性能诊断.set_counters(self.name, self.stats())
+        self.frame_ready.emit(result)
+
+    def _on_failed(self, serial, exc):
+        self.failed += 1
+        logger.error("%s: 第 %d 帧计算失败", self.name, serial, exc_info=exc)
+        性能诊断.set_counters(self.name, self.stats())
+        self.frame_failed.emit(exc)
+
+    def stats(self):
+        return {"submitted": self.submitted, "delivered": self.delivered, "failed": self.failed,
+                "cancelled": self.submitted - self.delivered - self.failed}
+
+
+class FrameCache:
+    """
+    按键缓存已渲染的帧，总内存超过 max_bytes 时按最近最少使用（LRU）的顺序淘汰。
+
+    存入的数组会被设为只读，取出后不要修改。
+    """
+
+    def __init__(self, name, max_bytes=FRAME_CACHE_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._frames.move_to_end(key)
+        性能诊断.set_counters(self.name, self.stats())
+        return frame
+
+    def put(self, key, frame):
+        if key in self._frames:
+            self.nbytes -= self._frames.pop(key).nbytes
+        frame.setflags(write=False)
+        self._frames[key] = frame
+        self.nbytes += frame.nbytes
+        while self.nbytes > self.max_bytes and len(self._frames) > 1:
+            self.nbytes -= self._frames.popitem(last=False)[1].nbytes
+
+    def clear(self):
+        self._frames.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        return {"frames": len(self._frames), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses}
@@ -9,31 +9,19 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.animation import FuncAnimation
 import math
 from matplotlib.colors import LinearSegmentedColormap
+import 性能诊断
+from 颜色映射 import wavelength_to_hex
 
 
 # 表示长度的物理量单位 m
 # 波长
 def wavelength2Hex(waveLength):
-    if 380 <= waveLength <= 440:
-        attenuation = 0.3 + 0.7 * (waveLength - 380) / (440 - 380)
-        r, g, b = ((-(waveLength - 440) / (440 - 380)) * attenuation) ** 0.8, 0.0, (1.0 * attenuation) ** 0.8
-    elif 440 <= waveLength <= 490:
-        r, g, b = 0.0, ((waveLength - 440) / (490 - 440)) ** 0.8, 1.0
-    elif 490 <= waveLength <= 510:
-        r, g, b = 0.0, 1.0, (-(waveLength - 510) / (510 - 490)) ** 0.8
-    elif 510 <= waveLength <= 580:
-        r, g, b = ((waveLength - 510) / (580 - 510)) ** 0.8, 1.0, 0.0
-    elif 580 <= waveLength <= 645:
-        r, g, b = 1.0, (-(waveLength - 645) / (645 - 580)) ** 0.8, 0.0
-    elif 645 <= waveLength <= 780:
-        attenuation = 0.3 + 0.7 * (750 - waveLength) / (750 - 645)
-        r, g, b = 1.0 * attenuation, 0.0, 0.0
-    else:
-        r, g, b = 0.0, 0.0, 0.0
-    return f'#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}'
+    # 查 380–780 nm 的预计算颜色表，也可以传入波长数组批量转换
+    return wavelength_to_hex(waveLength)
 
 
 class SinglePhotonDoubleSlitSimulator(QMainWindow):
+    @性能诊断.timed_init("单分子双缝干涉实验")
     def __init__(self):
         super().__init__()
 
@@ -97,7 +85,7 @@ class SinglePhotonDoubleSlitSimulator(QMainWindow):
         # 获取图片路径并设置固定大小
         current_dir = os.path.dirname(os.path.abspath(__file__))
         image_path = os.path.join(current_dir, '单分子双缝干涉实验.png')
-        pixmap = QPixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
 
@@ -125,6 +113,8 @@ class SinglePhotonDoubleSlitSimulator(QMainWindow):
         self.figures = [plt.figure(), plt.figure()]
         self.canvas1 = FigureCanvas(self.figures[0])
         self.canvas2 = FigureCanvas(self.figures[1])
+        性能诊断.watch_first_draw(self.canvas1, "单分子双缝干涉实验/干涉图")
+        性能诊断.watch_first_draw(self.canvas2, "单分子双缝干涉实验/光强分布")
         middle_layout.addWidget(self.canvas1)
         middle_layout.addWidget(self.canvas2)
 
@@ -7,6 +7,7 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5 import NavigationToolbar2QT as NavigationToolbar
+import 性能诊断
 
 PRIMARY_COLOR = "#4CAF50"
 SECONDARY_COLOR = "#2196F3"
@@ -19,6 +20,7 @@ plt.rcParams['axes.unicode_minus'] = False
 
 class DataProcessingUI(QMainWindow):
 
+    @性能诊断.timed_init("实验数据处理")
     def __init__(self):
         super().__init__()
         self.initUI()
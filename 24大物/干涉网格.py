@@ -0,0 +1,428 @@
+import threading
+import functools
+from collections import namedtuple, OrderedDict
+import numpy as np
+
+# 观察屏网格缓存的总内存上限（字节），超出时按最近最少使用的顺序淘汰
+GRID_CACHE_BYTES = 128 * 1024 * 1024
+
+# 渲染方式：full 逐像素计算光强；radial 利用圆环对称性只计算一条径向剖面再展开成图像
+RENDER_FULL = "full"
+RENDER_RADIAL = "radial"
+RENDER_MODE = RENDER_RADIAL
+
+# 径向剖面在一个像素间距内的采样数，越大越接近逐像素计算的结果
+RADIAL_OVERSAMPLING = 32
+
+# 把径向剖面展开成图像时按行分块，每块下标转换成 intp 的临时数组不超过这么多字节
+RADIAL_CHUNK_BYTES = 512 * 1024
+
+# 默认计算精度，各实验可以按需要改用 np.float64
+PRECISION = np.float32
+
+# 宽带光源的谱线线型
+LINE_GAUSSIAN = "gaussian"
+LINE_LORENTZIAN = "lorentzian"
+
+# 谱线的默认（最少）采样波长数
+SPECTRUM_SAMPLES = 64
+
+# 离散光谱叠加出的条纹会在某个光程差处虚假地“复现”，采样时保证复现位置至少是最大光程差的这么多倍
+SPECTRUM_ALIAS_MARGIN = 2.0
+
+# 谱线采样范围：中心波长两侧各取多少个半高全宽（洛伦兹线型拖尾长，取得更宽）
+SPECTRUM_SPAN = {LINE_GAUSSIAN: 3.0, LINE_LORENTZIAN: 10.0}
+
+# 按光谱累加光强时，每一块中间数组的内存上限（字节），放得进 CPU 缓存时最快
+SPECTRUM_CHUNK_BYTES = 1024 * 1024
+
+# cos_theta：径向剖面上各采样点的 cos(θ)；index：每个像素对应的剖面采样点下标
+RadialGrid = namedtuple("RadialGrid", ["cos_theta", "index"])
+
+# wavelengths：采样波长 (m)；weights：各波长的相对强度，总和为 1
+Spectrum = namedtuple("Spectrum", ["wavelengths", "weights"])
+
+
+class WorkBuffers:
+    """
+    预分配的工作数组，按 (名称, 形状, dtype) 复用。
+
+    每帧的计算把结果写进这些数组（ufunc 的 out= 参数），不再分配新的整幅数组。
+    同一组缓冲区只能在一个线程中使用，后台线程请用 thread_buffers()。
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=PRECISION):
+        key = (name, tuple(shape), np.dtype(dtype))
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = np.empty(shape, dtype)
+        return buffer
+
+    def clear(self):
+        self._buffers.clear()
+
+
+def _nbytes(value):
+    # 缓存值（数组或由数组组成的 namedtuple）占用的字节数
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+class GridCache:
+    """
+    按参数缓存网格数组的装饰器，总内存超过 max_bytes 时按最近最少使用（LRU）的顺序淘汰。
+
+    显示分辨率和细节层次几乎每次缩放都会产生新的 N，按字节而不是按条目数限制，
+    N 很大时也不会常驻大量内存。被装饰的函数共用同一个上限；后台线程也会取网格，因此加锁。
+    """
+
+    def __init__(self, max_bytes=GRID_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def cached(*args, **kwargs):
+            key = (function.__qualname__, args, tuple(sorted(kwargs.items())))
+            with self._lock:
+                value = self._values.get(key)
+                if value is not None:
+                    self._values.move_to_end(key)
+                    return value
+            value = function(*args, **kwargs)
+            self.put(key, value)
+            return value
+        return cached
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._values:
+                self.nbytes -= _nbytes(self._values.pop(key))
+            self._values[key] = value
+            self.nbytes += _nbytes(value)
+            while self.nbytes > self.max_bytes and len(self._values) > 1:
+                self.nbytes -= _nbytes(self._values.popitem(last=False)[1])
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.nbytes = 0
+
+
+grid_cache = GridCache()
+
+
+_thread_local = threading.local()
+
+
+def thread_buffers():
+    """返回当前线程专用的 WorkBuffers。"""
+    buffers = getattr(_thread_local, "buffers", None)
+    if buffers is None:
+        buffers = _thread_local.buffers = WorkBuffers()
+    return buffers
+
+
+@grid_cache
+def cos_theta_grid(N, half_width, focal_length, dtype=PRECISION):
+    """
+    返回 N × N 观察屏上每个像素对应的 cos(θ)，θ = arctan(r / f)。
+
+    同一组 (N, 半宽, 焦距, 精度) 在整个进程中只计算一次，各实验窗口共享同一个
+    只读数组，调用方不要修改它。
+
+    参数：
+    - N：每边的网格点数。
+    - half_width：观察屏半宽 (m)，网格范围为 [-half_width, half_width]。
+    - focal_length：透镜焦距 (m)。
+    - dtype：数组精度，默认 float32。
+    """
+    x = np.linspace(-half_width, half_width, N)
+    r2 = np.square(x)[np.newaxis, :] + np.square(x)[:, np.newaxis]
+    # cos(arctan(r / f)) = f / sqrt(r² + f²)
+    cos_theta = (focal_length / np.sqrt(r2 + focal_length ** 2)).astype(dtype)
+    cos_theta.setflags(write=False)
+    return cos_theta
+
+
+def fringe_intensity(cos_theta, path_difference, wavelength, out=None):
+    """
+    计算等倾干涉光强 I = cos²(2π · 光程差 · cos(θ) / λ)。
+
+    标量部分先合成一个系数，整幅图只做一次乘法、一次 cos、一次平方，
+    并且都在同一个数组上原地完成；给出 out 时不分配新数组。
+
+    参数：
+    - cos_theta：cos_theta_grid 返回的网格，结果与它的精度相同。
+    - path_difference：光程差 (m)。
+    - wavelength：波长 (m)。
+    - out：存放结果的数组，形状和精度与 cos_theta 相同。
+    """
+    phase = np.multiply(cos_theta, cos_theta.dtype.type(2 * np.pi * path_difference / wavelength), out=out)
+    np.cos(phase, out=phase)
+    np.square(phase, out=phase)
+    return phase
+
+
+@grid_cache
+def radial_grid(N, half_width, focal_length):
+    """
+    返回 N × N 观察屏的径向网格。
+
+    等倾干涉的光强只与半径有关，因此把半径按像素间距的 1/RADIAL_OVERSAMPLING
+    等距采样，预先算好每个像素最近的采样点下标；每帧只需在 O(N) 个采样点上
+    计算三角函数，再按下标展开成整幅图像。采样点远少于 65536 个，下标存为 uint16
+    （超出时为 int32），N = 2048 时只占 8 MiB。
+    """
+    x = np.linspace(-half_width, half_width, N)
+    r = np.sqrt(np.square(x)[np.newaxis, :] + np.square(x)[:, np.newaxis])
+    pixel = 2 * half_width / (N - 1) if N > 1 and half_width > 0 else 1.0
+    step = pixel / RADIAL_OVERSAMPLING
+    index = np.rint(r / step)
+    radii = np.arange(int(index.max()) + 1) * step
+    index = index.astype(np.uint16 if len(radii) <= np.iinfo(np.uint16).max + 1 else np.int32)
+    cos_theta = focal_length / np.sqrt(np.square(radii) + focal_length ** 2)
+    cos_theta.setflags(write=False)
+    index.setflags(write=False)
+    return RadialGrid(cos_theta, index)
+
+
+def expand_profile(profile, index, out=None):
+    """
+    按 radial_grid 的下标把径向剖面展开成整幅图像。
+
+    np.take 会先把下标整体转换成 intp，这里按行分块，每块的临时下标数组放得进 CPU 缓存，
+    速度与直接使用 intp 下标相当。给出 out 时直接写入 out。
+    """
+    if out is None:
+        out = np.empty(index.shape, profile.dtype)
+    rows = max(1, RADIAL_CHUNK_BYTES // (np.dtype(np.intp).itemsize * index.shape[-1]))
+    for start in range(0, len(index), rows):
+        np.take(profile, index[start:start + rows], out=out[start:start + rows], mode='clip')
+    return out
+
+
+@grid_cache
+def coordinate_planes(N, half_width, dtype=PRECISION):
+    """
+    返回 N × N 观察屏的 x、y 坐标平面 (X, Y)，只读，各窗口共享。
+
+    坐标平面是可分离的，X 存为 1 × N 的行、Y 存为 N × 1 的列，参与运算时
+    广播成完整的 N × N 平面，不占用 N² 的内存。
+    """
+    x = np.linspace(-half_width, half_width, N).astype(dtype)
+    X = x[np.newaxis, :].copy()
+    Y = x[:, np.newaxis].copy()
+    X.setflags(write=False)
+    Y.setflags(write=False)
+    return X, Y
+
+
+def tilted_fringe_intensity(cos_theta, planes, path_difference, tilt_x, tilt_y, wavelength, out=None):
+    """
+    计算动镜倾斜时的干涉光强 I = cos²(2π · (光程差 · cos(θ) + a·x + b·y) / λ)。
+
+    倾角为 0 时与 fringe_intensity 相同，倾角较大时圆环变为等厚干涉的直条纹。
+    坐标平面预先算好，倾角只改变两个标量系数：每个像素在 cos(θ) 项之外只多
+    两次原地加法（numpy 没有融合乘加，倾斜项先在 O(N) 的行、列上乘好系数）。
+
+    参数：
+    - cos_theta：cos_theta_grid 返回的网格。
+    - planes：coordinate_planes 返回的 (X, Y)。
+    - path_difference：光程差 (m)。
+    - tilt_x、tilt_y：x、y 方向的倾角 a、b (rad)。
+    - wavelength：波长 (m)。
+    - out：存放结果的数组，形状和精度与 cos_theta 相同。
+    """
+    X, Y = planes
+    k = 2 * np.pi / wavelength
+    scalar = cos_theta.dtype.type
+    phase = np.multiply(cos_theta, scalar(k * path_difference), out=out)
+    phase += X * scalar(k * tilt_x)
+    phase += Y * scalar(k * tilt_y)
+    np.cos(phase, out=phase)
+    np.square(phase, out=phase)
+    return phase
+
+
+def radial_fringe_intensity(grid, path_difference, wavelength, out=None, dtype=PRECISION):
+    """
+    用径向剖面计算等倾干涉光强，结果与 fringe_intensity 相同。
+
+    径向剖面总是用 float64 计算（只有 O(N) 个点），展开成图像时转换为 dtype。
+
+    参数：
+    - grid：radial_grid 返回的径向网格。
+    - path_difference：光程差 (m)。
+    - wavelength：波长 (m)。
+    - out：存放结果的 N × N 数组，给出时忽略 dtype。
+    - dtype：结果精度，默认 float32。
+    """
+    profile = np.square(np.cos(2 * np.pi * path_difference / wavelength * grid.cos_theta))
+    profile = profile.astype(out.dtype if out is not None else dtype, copy=False)
+    return expand_profile(profile, grid.index, out)
+
+
+def render_fringes(N, half_width, focal_length, path_difference, wavelength, mode=None, dtype=PRECISION, out=None):
+    """
+    按指定的渲染方式计算 N × N 等倾干涉图，网格取自共享缓存。
+
+    参数：
+    - N、half_width、focal_length：观察屏网格参数，见 cos_theta_grid。
+    - path_difference：光程差 (m)。
+    - wavelength：波长 (m)。
+    - mode：RENDER_FULL 或 RENDER_RADIAL，默认为 RENDER_MODE。
+    - dtype：计算精度，默认 float32。
+    - out：存放结果的 N × N 数组，给出时忽略 dtype，整帧不再分配新数组。
+    """
+    if out is not None:
+        dtype = out.dtype
+    if (mode or RENDER_MODE) == RENDER_RADIAL:
+        return radial_fringe_intensity(radial_grid(N, half_width, focal_length), path_difference, wavelength, out, dtype)
+    return fringe_intensity(cos_theta_grid(N, half_width, focal_length, np.dtype(dtype).type), path_difference, wavelength, out)
+
+
+def render_tilted_fringes(N, half_width, focal_length, path_difference, tilt_x, tilt_y, wavelength, dtype=PRECISION, out=None):
+    """
+    计算动镜倾斜时的 N × N 干涉图，网格与坐标平面取自共享缓存。
+
+    倾斜后不再有圆环对称性，总是逐像素计算；倾角都为 0 时退回 render_fringes。
+    其余参数见 render_fringes 和 tilted_fringe_intensity。
+    """
+    if out is not None:
+        dtype = out.dtype
+    if tilt_x == 0 and tilt_y == 0:
+        return render_fringes(N, half_width, focal_length, path_difference, wavelength, dtype=dtype, out=out)
+    dtype = np.dtype(dtype).type
+    return tilted_fringe_intensity(cos_theta_grid(N, half_width, focal_length, dtype), coordinate_planes(N, half_width, dtype),
+                                   path_difference, tilt_x, tilt_y, wavelength, out)
+
+
+def line_spectrum(center, fwhm, shape=LINE_GAUSSIAN, samples=SPECTRUM_SAMPLES, max_path_difference=None):
+    """
+    在中心波长两侧按等间距的波数采样高斯或洛伦兹谱线，返回 Spectrum。
+
+    波数间隔为 Δk 的离散光谱叠加出的光强 Σ w · cos²(k · 光程差) 以 π / Δk 为周期重复，
+    超过这个光程差后条纹可见度会虚假地复现。给出 max_path_difference 时自动增加采样数，
+    使复现位置至少是最大光程差的 SPECTRUM_ALIAS_MARGIN 倍。
+
+    参数：
+    - center：中心波长 (m)。
+    - fwhm：谱线半高全宽 (m)，为 0 时退化为单色光。
+    - shape：LINE_GAUSSIAN 或 LINE_LORENTZIAN。
+    - samples：最少的采样波长数 M。
+    - max_path_difference：使用该光谱时可能出现的最大光程差 (m)，为 None 时只用 samples 个采样点。
+    """
+    if fwhm <= 0:
+        return Spectrum(np.array([center], dtype=np.float64), np.ones(1))
+    if shape not in SPECTRUM_SPAN:
+        raise ValueError(f"未知的谱线线型：{shape}")
+    span = SPECTRUM_SPAN[shape] * fwhm
+    low = 2 * np.pi / (center + span)
+    high = 2 * np.pi / (center - span)
+    if max_path_difference:
+        samples = max(samples, int(np.ceil((high - low) * SPECTRUM_ALIAS_MARGIN * max_path_difference / np.pi)) + 1)
+    wavelengths = 2 * np.pi / np.linspace(low, high, samples)
+    offsets = wavelengths - center
+    if shape == LINE_GAUSSIAN:
+        weights = np.exp(-4 * np.log(2) * np.square(offsets / fwhm))
+    else:
+        weights = 1 / (1 + np.square(2 * offsets / fwhm))
+    # 谱线按波长给出，换成等间距的波数求和时乘以 dλ/dk ∝ λ²
+    weights *= np.square(wavelengths)
+    return Spectrum(wavelengths, weights / weights.sum())
+
+
+def custom_spectrum(wavelengths, intensities):
+    """由任意测得的光谱（波长 (m) 与相对强度）构造 Spectrum，强度会被归一化。"""
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    weights = np.asarray(intensities, dtype=np.float64)
+    return Spectrum(wavelengths, weights / weights.sum())
+
+
+def spectral_intensity(cos_theta, path_differences, spectrum, dtype=PRECISION, chunk_bytes=SPECTRUM_CHUNK_BYTES):
+    """
+    宽带光源的等倾干涉光强 I = Σ w_m · cos²(2π · 光程差 · cos(θ) / λ_m)。
+
+    各波长的条纹相互错开，光程差越大叠加后的条纹可见度越低。计算时把
+    (光程差, 波长, cos(θ)) 三个方向广播成一块中间数组，按块累加，每块不超过
+    chunk_bytes，因此内存与采样波长数 M 无关。
+
+    参数：
+    - cos_theta：任意形状的 cos(θ) 数组（径向剖面或整幅网格）。
+    - path_differences：光程差 (m)，标量或一维数组；为数组时一次算出整批扫描。
+    - spectrum：line_spectrum 或 custom_spectrum 返回的光谱。
+    - dtype：中间数组与结果的精度。
+
+    返回：
+    - 光程差为标量时形状与 cos_theta 相同，否则为 (光程差个数,) + cos_theta.shape。
+    """
+    cos_theta = np.asarray(cos_theta)
+    deltas = np.atleast_1d(np.asarray(path_differences, dtype=np.float64))
+    points = cos_theta.reshape(-1).astype(dtype, copy=False)
+    wavenumbers = 2 * np.pi / spectrum.wavelengths
+    weights = spectrum.weights.astype(dtype)
+    itemsize = np.dtype(dtype).itemsize
+    # 先按波长分块，一块放得下所有波长时再按光程差分块
+    wave_chunk = int(min(len(wavenumbers), max(1, chunk_bytes // (points.size * itemsize))))
+    delta_chunk = int(min(len(deltas), max(1, chunk_bytes // (wave_chunk * points.size * itemsize))))
+
+    result = np.zeros((len(deltas), points.size), dtype)
+    # 各块共用同一块中间数组
+    block = np.empty(delta_chunk * wave_chunk * points.size, dtype)
+    for d in range(0, len(deltas), delta_chunk):
+        rows = result[d:d + delta_chunk]
+        for m in range(0, len(wavenumbers), wave_chunk):
+            # (光程差, 波长) 的相位系数在 float64 下合成，再与 cos(θ) 广播
+            scale = np.multiply.outer(deltas[d:d + delta_chunk], wavenumbers[m:m + wave_chunk]).astype(dtype)
+            phase = block[:scale.size * points.size].reshape(scale.shape + points.shape)
+            np.multiply(scale[:, :, np.newaxis], points, out=phase)
+            np.cos(phase, out=phase)
+            np.square(phase, out=phase)
+            rows += np.matmul(weights[m:m + wave_chunk], phase)
+    shape = cos_theta.shape if np.ndim(path_differences) == 0 else (len(deltas),) + cos_theta.shape
+    return result.reshape(shape)
+
+
+def render_spectral_fringes(N, half_width, focal_length, path_difference, spectrum, mode=None, dtype=PRECISION, out=None):
+    """
+    按指定的渲染方式计算宽带光源的 N × N 等倾干涉图，参数见 render_fringes。
+
+    径向渲染时只在 O(N) 个剖面采样点上对光谱求和，再展开成图像。
+    """
+    if out is not None:
+        dtype = out.dtype
+    if (mode or RENDER_MODE) == RENDER_RADIAL:
+        grid = radial_grid(N, half_width, focal_length)
+        profile = spectral_intensity(grid.cos_theta, path_difference, spectrum, np.float64).astype(dtype, copy=False)
+        return expand_profile(profile, grid.index, out)
+    intensity = spectral_intensity(cos_theta_grid(N, half_width, focal_length, np.dtype(dtype).type), path_difference, spectrum, dtype)
+    if out is None:
+        return intensity
+    np.copyto(out, intensity)
+    return out
+
+
+def fringe_visibility(path_differences, spectrum, samples=32):
+    """
+    批量计算中心处（cos(θ) = 1）的条纹可见度 V = (Imax - Imin) / (Imax + Imin)。
+
+    在每个光程差之后的半个中心波长内（中心光强的一个周期）取 samples 个点求极值，
+    所有光程差一次批量计算。
+    """
+    deltas = np.atleast_1d(np.asarray(path_differences, dtype=np.float64))
+    center = np.average(spectrum.wavelengths, weights=spectrum.weights)
+    period = deltas[:, np.newaxis] + np.linspace(0, center / 2, samples, endpoint=False)
+    intensity = spectral_intensity(np.ones(1), period.reshape(-1), spectrum, np.float64).reshape(period.shape)
+    high = intensity.max(axis=1)
+    low = intensity.min(axis=1)
+    visibility = (high - low) / (high + low)
+    return visibility[0] if np.ndim(path_differences) == 0 else visibility
@@ -1,30 +1,178 @@
 import sys
+import time
+import logging
+import importlib
+from collections import OrderedDict
+
+_import_started = time.perf_counter()
 from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLabel, QTextEdit
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
-
-# 导入实验模块
-from 光电效应 import PhotoelectricEffectSimulator
-from 晶体双折射 import BirefringenceExperiment
-from 单分子双缝干涉实验 import SinglePhotonDoubleSlitSimulator
-from 迈克尔逊干涉演示 import MichelsonInterferenceSimulator
-from 光电效应测普朗克常量 import PlanckConstantSimulator
-from 迈克尔逊干涉测量波长 import MichelsonInterferenceApp
-from 实验数据处理 import DataProcessingUI
-from 测光速 import MichelsonInterferenceApp as SpeedOfLightExperiment
-from 测折射率 import MichelsonInterferenceApp as RefractiveIndexExperiment
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer
+import 性能诊断
+性能诊断.record(性能诊断.IMPORT, 'PyQt5', time.perf_counter() - _import_started)
+
+logger = logging.getLogger(__name__)
+
+# 实验注册表：实验名 -> (模块名, 窗口类名)
+# 实验模块会带入 pandas、scipy、matplotlib 等较重的依赖，因此不在启动时导入，
+# 而是在第一次点击对应按钮时才导入
+EXPERIMENT_REGISTRY = {
+    'double_slit': ('单分子双缝干涉实验', 'SinglePhotonDoubleSlitSimulator'),
+    'photoelectric': ('光电效应', 'PhotoelectricEffectSimulator'),
+    'birefringence': ('晶体双折射', 'BirefringenceExperiment'),
+    'michelson_demo': ('迈克尔逊干涉演示', 'MichelsonInterferenceSimulator'),
+    'planck': ('光电效应测普朗克常量', 'PlanckConstantSimulator'),
+    'michelson_measure': ('迈克尔逊干涉测量波长', 'MichelsonInterferenceApp'),
+    'data_processing': ('实验数据处理', 'DataProcessingUI'),
+    'speed_of_light': ('测光速', 'MichelsonInterferenceApp'),
+    'refractive_index': ('测折射率', 'MichelsonInterferenceApp'),
+}
+
+# 鼠标在实验按钮上停留多久（毫秒）后预导入该实验的模块
+PRELOAD_HOVER_MS = 300
+
+# 最多保留多少个已创建的实验窗口，超出时释放最久未使用的已关闭窗口
+WINDOW_POOL_LIMIT = 4
+
+
+class ExperimentRegistry:
+    """
+    按需导入实验模块的注册表。
+
+    get() 在第一次访问某个实验时才导入对应模块并缓存窗口类；
+    preload() 在主线程空闲时预先导入模块，之后点击按钮时即可直接使用。
+    实验模块导入时会选择 matplotlib 后端、修改 rcParams，这些都不能与界面线程并发，
+    因此预导入也在主线程中进行：每个事件循环空闲时段只导入一个模块，两次导入之间照常处理界面事件。
+    """
+
+    def __init__(self, registry=EXPERIMENT_REGISTRY):
+        self.registry = registry
+        self._classes = {}
+        self._pending = []
+        self._scheduled = False
+
+    def is_loaded(self, key):
+        return self.registry[key][0] in sys.modules
+
+    def get(self, key):
+        """返回实验的窗口类，必要时先导入模块。"""
+        if key not in self._classes:
+            module_name, class_name = self.registry[key]
+            with 性能诊断.timed(性能诊断.IMPORT, module_name, once=True):
+                module = importlib.import_module(module_name)
+            self._classes[key] = getattr(module, class_name)
+        return self._classes[key]
+
+    def preload(self, keys):
+        """把尚未加载的实验模块加入预导入队列，主线程空闲时依次导入。"""
+        self._pending.extend(key for key in keys if not self.is_loaded(key) and key not in self._pending)
+        self._schedule_preload()
+
+    def _schedule_preload(self):
+        if self._pending and not self._scheduled:
+            self._scheduled = True
+            QTimer.singleShot(0, self._preload_next)
+
+    def _preload_next(self):
+        # 每次只导入一个模块，其余的留到下一个空闲时段
+        self._scheduled = False
+        while self._pending:
+            key = self._pending.pop(0)
+            if self.is_loaded(key):
+                continue
+            try:
+                with 性能诊断.timed(性能诊断.IMPORT, self.registry[key][0], once=True):
+                    importlib.import_module(self.registry[key][0])
+            except Exception as exc:
+                # 预加载失败不影响主界面，点击按钮时会重新导入并报出错误
+                logger.warning("预加载实验模块失败：%s", self.registry[key][0], exc_info=exc)
+            break
+        self._schedule_preload()
+
+
+class ExperimentWindowPool(QObject):
+    """
+    按实验类型缓存实验窗口。
+
+    关闭实验窗口只是把它隐藏起来，再次打开同一个实验时直接取回之前的窗口，
+    参数、图像和表格数据都保持不变。窗口数超过 limit 时按最近最少使用（LRU）的顺序
+    释放已关闭的窗口；正在屏幕上使用的窗口不会被释放，全部窗口都开着时暂时超出上限，
+    等有窗口关闭后再释放。
+    """
+
+    def __init__(self, limit=WINDOW_POOL_LIMIT, parent=None):
+        super().__init__(parent)
+        self.limit = limit
+        self._windows = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._windows
+
+    def __len__(self):
+        return len(self._windows)
+
+    def acquire(self, key, factory):
+        """取回 key 对应的窗口，不存在时用 factory() 创建。"""
+        if key in self._windows:
+            self._windows.move_to_end(key)
+            return self._windows[key]
+        window = factory()
+        window.setAttribute(Qt.WA_DeleteOnClose, False)
+        window.installEventFilter(self)
+        self._windows[key] = window
+        self._evict(keep=key)
+        return window
+
+    def set_limit(self, limit):
+        self.limit = limit
+        self._evict()
+
+    def clear(self):
+        while self._windows:
+            self._release(self._windows.popitem(last=False)[1])
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Close:
+            # 关闭事件处理完之后窗口才隐藏，届时再检查是否超出上限
+            QTimer.singleShot(0, self._evict)
+        return False
+
+    def _evict(self, keep=None):
+        excess = len(self._windows) - max(self.limit, 1)
+        if excess <= 0:
+            return
+        hidden = [key for key, window in self._windows.items() if key != keep and not window.isVisible()]
+        for key in hidden[:excess]:
+            self._release(self._windows.pop(key))
+
+    @staticmethod
+    def _release(window):
+        window.close()
+        window.deleteLater()
+
 
 class MainPlatform(QMainWindow):
+    @性能诊断.timed_init('平台')
     def __init__(self):
         super().__init__()
 
+        # 实验模块按需导入；鼠标在某个实验按钮上停留时预导入这一个实验
+        self.experiment_registry = ExperimentRegistry()
+        self.preload_keys = []
+        self.preload_timer = QTimer(self)
+        self.preload_timer.setSingleShot(True)
+        self.preload_timer.setInterval(PRELOAD_HOVER_MS)
+        self.preload_timer.timeout.connect(self.preload_experiments)
+
+        # 已打开过的实验窗口保存在窗口池中，再次打开时保留原有状态
+        self.window_pool = ExperimentWindowPool(parent=self)
+
         # 设置窗口属性
         self.setWindowTitle('基于Python的光学仿真实验平台')
         self.setGeometry(100, 100, 1200, 700)
 
         # 设置背景图片
         self.background_label = QLabel(self)
-        pixmap = QPixmap("仿真平台.jpg")  # 替换为背景图片的路径
+        pixmap = 性能诊断.load_pixmap("仿真平台.jpg")  # 替换为背景图片的路径
         self.background_label.setPixmap(pixmap)
         self.background_label.setScaledContents(True)
         self.background_label.setGeometry(0, 0, 1200, 700)
@@ -181,6 +329,18 @@ class MainPlatform(QMainWindow):
         """)
         button_layout.addWidget(read_button)
 
+        # 性能诊断按钮：查看启动和各实验窗口的构建耗时
+        diagnostics_button = QPushButton('性能诊断')
+        diagnostics_button.setStyleSheet("""
+            font-size: 22px;
+            padding: 10px 20px;
+            background-color: #6c757d;
+            color: white;
+            border-radius: 10px;
+        """)
+        diagnostics_button.clicked.connect(self.show_diagnostics)
+        button_layout.addWidget(diagnostics_button)
+
         # 初始化显示默认的演示实验
         self.show_demo_experiment()
 
@@ -213,7 +373,8 @@ class MainPlatform(QMainWindow):
             ('晶体双折射实验', self.run_birefringence_experiment),
             ('迈克尔逊干涉实验', self.run_michelson_demo_experiment)
         ]
-        for name, func in buttons:
+        keys = ['double_slit', 'photoelectric', 'birefringence', 'michelson_demo']
+        for (name, func), key in zip(buttons, keys):
             btn = QPushButton(name)
             btn.setStyleSheet("""
                 font-size: 20px;
@@ -223,6 +384,7 @@ class MainPlatform(QMainWindow):
                 border-radius: 10px;
             """)
             btn.clicked.connect(func)
+            self.watch_hover(btn, key)
             self.experiment_button_layout.addWidget(btn)
 
     # 显示仿真实验按钮的实验列表，并添加两个新实验
@@ -254,7 +416,8 @@ class MainPlatform(QMainWindow):
             ('基于迈克尔逊测量光速', self.run_speed_of_light_experiment),  # 新增测光速实验按钮
             ('基于迈克尔逊测量折射率', self.run_refractive_index_experiment)  # 新增测折射率实验按钮
         ]
-        for name, func in buttons:
+        keys = ['michelson_measure', 'planck', 'speed_of_light', 'refractive_index']
+        for (name, func), key in zip(buttons, keys):
             btn = QPushButton(name)
             btn.setStyleSheet("""
                 font-size: 20px;
@@ -264,6 +427,7 @@ class MainPlatform(QMainWindow):
                 border-radius: 10px;
             """)
             btn.clicked.connect(func)
+            self.watch_hover(btn, key)
             self.experiment_button_layout.addWidget(btn)
 
     # 显示数据处理实验按钮
@@ -298,6 +462,7 @@ class MainPlatform(QMainWindow):
             border-radius: 10px;
         """)
         btn.clicked.connect(self.run_data_processing_experiment)
+        self.watch_hover(btn, 'data_processing')
         self.experiment_button_layout.addWidget(btn)
 
     # 清空实验按钮区
@@ -307,50 +472,74 @@ class MainPlatform(QMainWindow):
             if widget:
                 widget.setParent(None)
 
+    # 鼠标在实验按钮上停留一段时间后预导入该实验的模块，移开时取消
+    def watch_hover(self, button, key):
+        button.setProperty('experiment_key', key)
+        button.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        key = watched.property('experiment_key')
+        if key:
+            if event.type() == QEvent.Enter:
+                self.schedule_preload([key])
+            elif event.type() == QEvent.Leave:
+                self.preload_timer.stop()
+        return super().eventFilter(watched, event)
+
+    def schedule_preload(self, keys):
+        self.preload_keys = keys
+        self.preload_timer.start()
+
+    def preload_experiments(self):
+        self.experiment_registry.preload(self.preload_keys)
+
+    # 显示性能诊断对话框
+    def show_diagnostics(self):
+        self.diagnostics_dialog = 性能诊断.DiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+
+    # 打开实验窗口，实验模块在第一次打开时才导入，已打开过的窗口从窗口池中取回
+    def open_experiment(self, key):
+        self.experiment_window = self.window_pool.acquire(key, lambda: self.experiment_registry.get(key)())
+        self.experiment_window.showNormal()
+        self.experiment_window.raise_()
+        self.experiment_window.activateWindow()
+
     # 运行单光子双缝实验
     def run_double_slit_experiment(self):
-        self.experiment_window = SinglePhotonDoubleSlitSimulator()
-        self.experiment_window.show()
+        self.open_experiment('double_slit')
 
     # 运行光电效应实验
     def run_photoelectric_effect_experiment(self):
-        self.experiment_window = PhotoelectricEffectSimulator()
-        self.experiment_window.show()
+        self.open_experiment('photoelectric')
 
     # 运行晶体双折射实验
     def run_birefringence_experiment(self):
-        self.experiment_window = BirefringenceExperiment()
-        self.experiment_window.show()
+        self.open_experiment('birefringence')
 
     # 运行迈克尔逊干涉实验
     def run_michelson_demo_experiment(self):
-        self.experiment_window = MichelsonInterferenceSimulator()
-        self.experiment_window.show()
+        self.open_experiment('michelson_demo')
 
     # 运行光电效应测普朗克常量实验
     def run_planck_experiment(self):
-        self.experiment_window = PlanckConstantSimulator()
-        self.experiment_window.show()
+        self.open_experiment('planck')
 
     # 运行测光的相干长度实验
     def run_michelson_measure_experiment(self):
-        self.experiment_window = MichelsonInterferenceApp()
-        self.experiment_window.show()
+        self.open_experiment('michelson_measure')
 
     # 新增：运行测光速实验
     def run_speed_of_light_experiment(self):
-        self.experiment_window = SpeedOfLightExperiment()
-        self.experiment_window.show()
+        self.open_experiment('speed_of_light')
 
     # 新增：运行测折射率实验
     def run_refractive_index_experiment(self):
-        self.experiment_window = RefractiveIndexExperiment()
-        self.experiment_window.show()
+        self.open_experiment('refractive_index')
 
     # 运行数据处理平台
     def run_data_processing_experiment(self):
-        self.experiment_window = DataProcessingUI()
-        self.experiment_window.show()
+        self.open_experiment('data_processing')
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,197 @@
+import json
+import sys
+import time
+import platform
+import threading
+import functools
+from contextlib import contextmanager
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QFileDialog, QHeaderView, QMessageBox
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtGui import QPixmap
+
+# 计时类别
+IMPORT = "模块导入"
+WIDGETS = "窗口构建"
+FIRST_DRAW = "首次绘制"
+ASSETS = "资源加载"
+
+# 全进程共享的计时记录，预加载线程也会写入，因此加锁
+_records = []
+_counters = {}
+_lock = threading.Lock()
+_process_started = time.perf_counter()
+
+
+def record(category, name, seconds):
+    """
+    添加一条计时记录。
+
+    参数：
+    - category：计时类别，如 模块导入 / 窗口构建 / 首次绘制 / 资源加载。
+    - name：被计时对象的名称。
+    - seconds：耗时（秒）。
+    """
+    with _lock:
+        _records.append({
+            "category": category,
+            "name": name,
+            "seconds": seconds,
+            "at": time.perf_counter() - _process_started,
+            "thread": threading.current_thread().name,
+        })
+
+
+def has_record(category, name):
+    with _lock:
+        return any(item["category"] == category and item["name"] == name for item in _records)
+
+
+@contextmanager
+def timed(category, name, once=False):
+    """
+    统计 with 语句块的耗时并记录。
+
+    once 为 True 时同一 (category, name) 只记录第一次，适合会被反复调用的代码。
+    """
+    if once and has_record(category, name):
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(category, name, time.perf_counter() - started)
+
+
+def timed_init(name):
+    """装饰实验窗口的 __init__，记录整个窗口的构建耗时。"""
+    def decorator(init):
+        @functools.wraps(init)
+        def wrapper(self, *args, **kwargs):
+            with timed(WIDGETS, name):
+                init(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def watch_first_draw(canvas, name):
+    """记录 matplotlib 画布第一次 draw 的耗时，之后恢复原来的 draw 方法。"""
+    original_draw = canvas.draw
+
+    def draw(*args, **kwargs):
+        canvas.draw = original_draw
+        with timed(FIRST_DRAW, name):
+            return original_draw(*args, **kwargs)
+
+    canvas.draw = draw
+
+
+def load_pixmap(path):
+    """加载图片并记录耗时。"""
+    with timed(ASSETS, str(path)):
+        return QPixmap(path)
+
+
+def set_counters(name, values):
+    """更新一组计数（如刷新调度器的渲染帧数和丢弃帧数），同名的旧值会被覆盖。"""
+    with _lock:
+        _counters[name] = dict(values)
+
+
+def records():
+    with _lock:
+        return [dict(item) for item in _records]
+
+
+def counters():
+    with _lock:
+        return {name: dict(values) for name, values in _counters.items()}
+
+
+def summary():
+    """按类别汇总耗时，返回 {类别: {"count": 条数, "seconds": 总耗时}}。"""
+    result = {}
+    for item in records():
+        entry = result.setdefault(item["category"], {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += item["seconds"]
+    return result
+
+
+def report():
+    return {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "uptime": time.perf_counter() - _process_started,
+        "summary": summary(),
+        "records": records(),
+        "counters": counters(),
+    }
+
+
+def export_json(file_name):
+    with open(file_name, 'w', encoding='utf-8') as file:
+        json.dump(report(), file, ensure_ascii=False, indent=2)
+
+
+class DiagnosticsDialog(QDialog):
+    """显示启动与窗口构建耗时的诊断对话框，可导出为 JSON。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能诊断")
+        self.resize(800, 600)
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-size: 18px; border: 2px solid #7f8c8d; padding: 10px; background-color: white;")
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["类别", "名称", "耗时 (ms)", "时刻 (s)"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.setStyleSheet("font-size: 16px;")
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        layout.addLayout(button_layout)
+
+        refresh_button = QPushButton("刷新")
+        refresh_button.setStyleSheet("font-size: 18px; background-color: #007bff; color: white;")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+
+        export_button = QPushButton("导出 JSON")
+        export_button.setStyleSheet("font-size: 18px; background-color: #28a745; color: white;")
+        export_button.clicked.connect(self.export_report)
+        button_layout.addWidget(export_button)
+
+        close_button = QPushButton("关闭")
+        close_button.setStyleSheet("font-size: 18px; background-color: #dc3545; color: white;")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+
+        self.refresh()
+
+    def refresh(self):
+        items = records()
+        self.table.setRowCount(len(items))
+        for row, item in enumerate(items):
+            self.table.setItem(row, 0, QTableWidgetItem(item["category"]))
+            self.table.setItem(row, 1, QTableWidgetItem(item["name"]))
+            self.table.setItem(row, 2, QTableWidgetItem(f"{item['seconds'] * 1e3:.1f}"))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{item['at']:.2f}"))
+
+        lines = [f"{category}：{entry['count']} 项，共 {entry['seconds'] * 1e3:.1f} ms" for category, entry in summary().items()]
+        lines += [f"{name}：" + "，".join(f"{key} {value}" for key, value in values.items()) for name, values in counters().items()]
+        self.summary_label.setText("\n".join(lines) if lines else "暂无计时数据。")
+
+    def export_report(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "导出诊断数据", "startup_timing.json", "JSON Files (*.json);;All Files (*)")
+        if file_name:
+            export_json(file_name)
+            QMessageBox.information(self, "成功", "诊断数据已导出。")
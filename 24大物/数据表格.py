@@ -0,0 +1,118 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from 测量记录 import MeasurementStore
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """
+    以 numpy 列数组（测量记录.MeasurementStore）为数据的表格模型，配合 QTableView 使用。
+
+    数据只存一份在列数组里，视图需要显示某个单元格时才按 formats 格式化成文字，
+    因此 10^5 行的数据也只格式化屏幕上可见的几十行。extend() 每批只调用一次
+    beginInsertRows，replace() 和 clear() 整体重置，不再逐行 insertRow / setItem。
+    浮点数列中的 nan 显示为空白单元格；整数列只接受整数输入，输入小数或留空时不修改；
+    字符串列输入超过列宽时不修改，不会被截断。
+
+    参数：
+    - names：列名（表头）。
+    - formats：每列的 % 格式，如 "%.2f"。
+    - dtypes：每列的 numpy 类型，默认全部为 float64。
+    - editable：允许在表格中直接修改的列号。
+    """
+
+    def __init__(self, names, formats, dtypes=None, editable=(), parent=None):
+        super().__init__(parent)
+        self.store = MeasurementStore(names, dtypes)
+        self.formats = list(formats)
+        self.editable = set(editable)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.names)
+
+    def text(self, row, column):
+        """第 row 行第 column 列显示的文字。"""
+        value = self.store.column(column)[row]
+        if isinstance(value, np.floating) and np.isnan(value):
+            return ""
+        return self.formats[column] % value
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.text(index.row(), index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.store.names[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in self.editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        column = self.store.column(index.column())
+        text = str(value).strip()
+        if np.issubdtype(column.dtype, np.floating):
+            try:
+                value = float(text) if text else np.nan
+            except ValueError:
+                return False
+        elif np.issubdtype(column.dtype, np.integer):
+            try:
+                value = int(text)
+            except ValueError:
+                return False
+        elif np.issubdtype(column.dtype, np.str_):
+            if len(text) > column.dtype.itemsize // np.dtype("U1").itemsize:
+                return False
+            value = text
+        self.store.assign(index.column(), index.row(), value)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def column(self, index):
+        return self.store.column(index)
+
+    def columns(self):
+        return self.store.columns()
+
+    def append(self, *values):
+        self.extend(*[[value] for value in values])
+
+    def extend(self, *columns):
+        """在表格末尾批量追加多行，整批只通知视图一次。"""
+        n = np.broadcast(*[np.atleast_1d(column) for column in columns]).shape[0]
+        if n == 0:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + n - 1)
+        self.store.extend(*columns)
+        self.endInsertRows()
+
+    def assign(self, index, rows, values):
+        """修改第 index 列中 rows 所指的行，并通知视图刷新这一列。"""
+        self.store.assign(index, rows, values)
+        if len(self.store):
+            self.dataChanged.emit(self.index(0, index), self.index(len(self.store) - 1, index))
+
+    def replace(self, *columns):
+        """用新的列数组替换全部数据。"""
+        self.beginResetModel()
+        self.store.clear()
+        self.store.extend(*columns)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
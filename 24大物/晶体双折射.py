@@ -6,6 +6,7 @@ from PyQt5.QtGui import QPixmap, QColor
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import 性能诊断
 
 # 常量定义
 c = 3.0e8  # 光速 (m/s)
@@ -18,6 +19,7 @@ crystal_data = {
 }
 
 class BirefringenceExperiment(QMainWindow):
+    @性能诊断.timed_init("晶体双折射")
     def __init__(self):
         super().__init__()
         # 设置主窗口属性
@@ -86,7 +88,7 @@ class BirefringenceExperiment(QMainWindow):
         # 设置图片路径并加载图片
         self.principle_img = QLabel()
         image_path = "晶体双折射.jpg"  # 替换为正确的图片路径
-        pixmap = QPixmap(image_path).scaled(500, 350, Qt.KeepAspectRatio)
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(500, 350, Qt.KeepAspectRatio)
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
         principle_layout.addWidget(self.principle_img)
@@ -117,6 +119,7 @@ class BirefringenceExperiment(QMainWindow):
         # 仿真图像
         self.figure, self.ax = plt.subplots(figsize=(12, 10))  # 调大图像尺寸
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "晶体双折射")
         simulation_layout.addWidget(self.canvas)
 
         # 右侧布局：参数设置和操作区
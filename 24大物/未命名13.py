@@ -1,13 +1,16 @@
 import sys
 import os
 import numpy as np
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableWidget, QTableWidgetItem, QMessageBox
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableView, QMessageBox
 from PyQt5.QtCore import Qt, QUrl
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget  # 修复导入
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from 数据表格 import ArrayTableModel
+from 数据导出 import save_columns
+from 普朗克拟合 import NOISE_AMPLITUDE, stopping_voltages, fit_planck, format_fit
 
 # 载入黑体字体以支持中文显示
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置默认字体为黑体
@@ -21,6 +24,9 @@ c = 3.0e8           # 光速 (m/s)
 # 金属逸出功数据 (单位: eV)
 work_function_data = {"铜": 4.7, "铝": 4.2, "金": 5.1, "银": 4.26, "锌": 4.33}
 
+# 图中每次计算最多画出的数据点数，点更多时等间隔抽取；拟合始终使用全部数据
+PLOT_POINTS = 5000
+
 class PlanckConstantSimulator(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -102,7 +108,9 @@ class PlanckConstantSimulator(QMainWindow):
         middle_layout.addWidget(result_label)
 
         # 增加仿真图高度
-        self.figure, self.axs = plt.subplots(1, 1, figsize=(6, 10))  # 调整图像尺寸，使仿真结果图更高
+        # 上方为数据点和拟合直线，下方为拟合残差
+        self.figure, (self.axs, self.residual_axs) = plt.subplots(
+            2, 1, figsize=(6, 10), sharex=True, gridspec_kw={"height_ratios": [3, 1]})  # 调整图像尺寸，使仿真结果图更高
         self.canvas = FigureCanvas(self.figure)
         middle_layout.addWidget(self.canvas)
 
@@ -164,10 +172,10 @@ class PlanckConstantSimulator(QMainWindow):
         data_table_title.setStyleSheet("font-size: 24px; font-weight: bold; border: 2px solid #7f8c8d; padding: 10px; background-color: #b3cde0;")
         data_table_layout.addWidget(data_table_title)
 
-        # 初始化数据表格时不预先设置行数
-        self.data_table = QTableWidget()
-        self.data_table.setColumnCount(2)
-        self.data_table.setHorizontalHeaderLabels(["光频率 (THz)", "遏止电压 (V)"])
+        # 初始化数据表格时不预先设置行数；数据保存在 numpy 列数组中，表格只格式化可见的行
+        self.table_model = ArrayTableModel(["光频率 (THz)", "遏止电压 (V)"], ["%.2f", "%.2f"], parent=self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.table_model)
         data_table_layout.addWidget(self.data_table)
 
         # 处理区：计算、清除、保存按钮
@@ -200,9 +208,8 @@ class PlanckConstantSimulator(QMainWindow):
         self.save_data_button.clicked.connect(self.save_data)
         process_layout.addWidget(self.save_data_button)
 
-        # 数据存储
-        self.frequency_data = []
-        self.stopping_voltage_data = []
+        # 数据存储：每次计算的 (金属种类, 频率数组, 遏止电压数组, 拟合结果)
+        self.runs = []
 
     def calculate_results(self):
         # 获取输入的最低频率、最高频率和间距
@@ -213,54 +220,57 @@ class PlanckConstantSimulator(QMainWindow):
         except ValueError:
             QMessageBox.warning(self, "输入错误", "请确保频率和间距的输入值有效！")
             return
+        if min_freq >= max_freq:
+            QMessageBox.warning(self, "输入错误", "最低光频率必须小于最高光频率！")
+            return
+        if interval < 2:
+            QMessageBox.warning(self, "输入错误", "拟合至少需要两个不同的频率！")
+            return
 
         # 获取用户选择的金属种类
         selected_metal = self.metal_combo.currentText()
         work_function_eV = work_function_data[selected_metal]  # 根据选择的金属种类获取逸出功
-        work_function_J = work_function_eV * e
 
         # 生成频率范围
         frequencies = np.linspace(min_freq, max_freq, interval)
 
-        # 清空现有数据，以便新数据从第一行开始
-        self.data_table.setRowCount(0)  # 确保从第一行开始
-
-        for freq_THz in frequencies:
-            frequency_Hz = freq_THz * 1e12  # 转换为 Hz
+        # 整个频率序列一次生成，再用最小二乘拟合 h 和逸出功
+        voltages = stopping_voltages(frequencies, work_function_eV, 0, h_true)
+        fit = fit_planck(frequencies, voltages)
+        self.runs.append((selected_metal, frequencies, voltages, fit))
 
-            # 计算遏止电压
-            stopping_voltage = (h_true * frequency_Hz - work_function_J) / e
-
-            # 在表格中显示结果
-            row_position = self.data_table.rowCount()
-            self.data_table.insertRow(row_position)
-            self.data_table.setItem(row_position, 0, QTableWidgetItem(f"{freq_THz:.2f}"))
-            self.data_table.setItem(row_position, 1, QTableWidgetItem(f"{stopping_voltage:.2f}"))
-
-            # 保存数据
-            self.frequency_data.append(freq_THz)
-            self.stopping_voltage_data.append(stopping_voltage)
+        # 整批结果一次写入表格
+        self.table_model.replace(frequencies, voltages)
 
         # 更新实验结果图形
         self.update_plot()
 
     def update_plot(self):
         self.axs.clear()
-
-        # 绘制频率 vs 遏止电压的关系，只保留数据点，不显示拟合曲线
-        self.axs.scatter(self.frequency_data, self.stopping_voltage_data, color='b', label="实验数据")
+        self.residual_axs.clear()
+
+        # 绘制频率 vs 遏止电压的关系和拟合直线，每次计算用一种颜色；点数很多时只画等间隔抽取的点
+        for metal, frequencies, voltages, fit in self.runs:
+            step = max(1, len(frequencies) // PLOT_POINTS)
+            points, = self.axs.plot(frequencies[::step], voltages[::step], '.', label=f"{metal} 实验数据")
+            ends = frequencies[[0, -1]]
+            self.axs.plot(ends, fit.intercept + fit.slope * ends, '-', color=points.get_color(), label=format_fit(fit))
+            self.residual_axs.plot(frequencies[::step], fit.residuals[::step], '.', markersize=2, color=points.get_color())
         self.axs.set_title("频率与遏止电压的关系", fontsize=20)
-        self.axs.set_xlabel("频率 (THz)", fontsize=18)
         self.axs.set_ylabel("遏止电压 (V)", fontsize=18)
+        self.residual_axs.axhline(0, color='gray', linewidth=1)
+        self.residual_axs.set_xlabel("频率 (THz)", fontsize=18)
+        self.residual_axs.set_ylabel("残差 (V)", fontsize=18)
 
-        self.axs.legend()
+        if self.runs:
+            self.axs.legend(fontsize=9)
         self.canvas.draw()
 
     def clear_data(self):
-        self.data_table.clearContents()
-        self.frequency_data.clear()
-        self.stopping_voltage_data.clear()
+        self.table_model.clear()
+        self.runs.clear()
         self.axs.clear()
+        self.residual_axs.clear()
         self.canvas.draw()
 
     def save_image(self):
@@ -273,11 +283,10 @@ class PlanckConstantSimulator(QMainWindow):
     def save_data(self):
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(self, "保存数据", "", "Text Files (*.txt);;CSV Files (*.csv);;All Files (*)", options=options)
-        if file_name:
-            with open(file_name, 'w') as file:
-                file.write("光频率 (THz), 遏止电压 (V)\n")
-                for freq, voltage in zip(self.frequency_data, self.stopping_voltage_data):
-                    file.write(f"{freq:.2f}, {voltage:.2f}\n")
+        if file_name and self.runs:
+            # 所有计算的数据连同各自的拟合残差一次批量写出
+            columns = [np.concatenate(arrays) for arrays in zip(*[(f, v, fit.residuals) for _, f, v, fit in self.runs])]
+            save_columns(file_name, ["光频率 (THz)", "遏止电压 (V)", "拟合残差 (V)"], columns, ["%.2f", "%.2f", "%.4f"])
 
     # 播放视频的功能
     def play_video(self):
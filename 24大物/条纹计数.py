@@ -0,0 +1,113 @@
+from collections import namedtuple
+import numpy as np
+from 干涉网格 import PRECISION, spectral_intensity
+
+# 一次扫描的采样点数
+SWEEP_SAMPLES = 1_000_000
+
+# 探测器噪声（相对于光强最大值的标准差）
+DETECTOR_NOISE = 0.02
+
+# 过零检测的滞回阈值（相对于满可见度时的条纹振幅 0.5）：信号要越过均值 ± 阈值才算换了一侧，
+# 噪声不会造成重复计数，可见度太低的条纹也不会被计数
+HYSTERESIS = 0.2
+
+# 光强归一化后，满可见度的条纹振幅
+FRINGE_AMPLITUDE = 0.5
+
+# wavelength：拟合得到的波长 (m)；uncertainty：波长的标准差 (m)；
+# intercept：第 0 级条纹的位置 (m)；residuals：各级条纹位置的拟合残差 (m)
+WavelengthFit = namedtuple("WavelengthFit", ["wavelength", "uncertainty", "intercept", "residuals"])
+
+
+def central_intensity(positions, wavelength, noise=DETECTOR_NOISE, rng=None, spectrum=None):
+    """
+    计算动镜位置序列上的中心光强 I = cos²(2π · 位置 / λ)，并叠加探测器噪声。
+
+    整个序列一次向量化计算，位置的单位与 wavelength 相同；
+    与干涉图一致，动镜每移动 λ / 2，中心冒出（或吞进）一个条纹。
+    给出 spectrum 时按宽带光源对光谱求和（分块批量计算），条纹可见度随位置衰减。
+
+    参数：
+    - positions：动镜位置数组 (m)。
+    - wavelength：波长 (m)。
+    - noise：噪声的标准差，0 表示不加噪声。
+    - rng：np.random.Generator，默认新建一个。
+    - spectrum：干涉网格.Spectrum，为 None 时是波长为 wavelength 的单色光。
+    """
+    if spectrum is None:
+        intensity = np.multiply(positions, 2 * np.pi / wavelength)
+        np.cos(intensity, out=intensity)
+        np.square(intensity, out=intensity)
+    else:
+        # 相位系数先在 float64 下合成，求和用 float32 足够且快一倍
+        intensity = spectral_intensity(np.ones(1), positions, spectrum, PRECISION).reshape(-1)
+    if noise:
+        rng = rng or np.random.default_rng()
+        intensity += rng.normal(0.0, noise, intensity.shape)
+    return intensity
+
+
+def fringe_positions(positions, intensity, hysteresis=HYSTERESIS):
+    """
+    检测中心光强每次由暗变亮穿过均值的位置，每个位置对应一个条纹。
+
+    信号去掉均值后，低于 -阈值记为暗、高于 +阈值记为亮，中间的采样点沿用前一个状态，
+    阈值为 hysteresis 乘以 FRINGE_AMPLITUDE。每次由暗变亮时，在越过 +阈值的两个采样点
+    之间线性插值得到条纹位置；固定的阈值只使所有位置平移同一个量，不影响波长的拟合。
+    """
+    signal = intensity - intensity.mean()
+    threshold = hysteresis * FRINGE_AMPLITUDE
+    state = np.zeros(signal.shape, np.int8)
+    state[signal > threshold] = 1
+    state[signal < -threshold] = -1
+    decided = np.flatnonzero(state)
+    states = state[decided]
+    # rises 是由暗变亮后第一个判为亮的采样点
+    rises = decided[1:][(states[1:] == 1) & (states[:-1] == -1)]
+    before = signal[rises - 1]
+    after = signal[rises]
+    fraction = (threshold - before) / (after - before)
+    return positions[rises - 1] + fraction * (positions[rises] - positions[rises - 1])
+
+
+def fit_wavelength(orders, positions):
+    """
+    最小二乘拟合 位置 = 截距 + 级次 · λ / 2，返回 WavelengthFit。
+
+    参数：
+    - orders：条纹级次（横移条纹数）。
+    - positions：各级条纹对应的动镜位置 (m)。
+    """
+    orders = np.asarray(orders, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    n = len(orders)
+    mean_order = orders.mean()
+    centered = orders - mean_order
+    sxx = np.dot(centered, centered)
+    slope = np.dot(centered, positions) / sxx
+    intercept = positions.mean() - slope * mean_order
+    residuals = positions - (intercept + slope * orders)
+    slope_error = np.sqrt(np.dot(residuals, residuals) / (n - 2) / sxx) if n > 2 else np.nan
+    return WavelengthFit(2 * slope, 2 * slope_error, intercept, residuals)
+
+
+def sweep_fringes(start, wavelength, fringes, samples=SWEEP_SAMPLES, noise=DETECTOR_NOISE, seed=None, spectrum=None):
+    """
+    从 start 开始扫描动镜，直到中心至少经过 fringes + 1 个条纹，返回各级条纹的位置 (m)。
+
+    参数：
+    - start：动镜起始位置 (m)。
+    - wavelength：波长 (m)。
+    - fringes：需要的最大条纹级次，返回数组长度至少为 fringes + 1。
+    - samples：扫描采样点数。
+    - noise：探测器噪声。
+    - seed：随机数种子。
+    - spectrum：宽带光源的光谱，见 central_intensity。超出相干长度后条纹可见度
+      低于噪声，能数到的条纹会少于 fringes + 1。
+    """
+    # 多扫两个条纹，保证第 fringes 级条纹一定落在扫描范围内
+    length = (fringes + 2) * wavelength / 2
+    positions = np.linspace(start, start + length, samples)
+    intensity = central_intensity(positions, wavelength, noise, np.random.default_rng(seed), spectrum)
+    return fringe_positions(positions, intensity)
@@ -1,17 +1,51 @@
 
 import sys
+from collections import namedtuple
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-                             QLabel, QPushButton, QComboBox, QLineEdit, QSlider, QTableWidget,
-                             QTableWidgetItem, QFileDialog, QMessageBox)
+                             QLabel, QPushButton, QComboBox, QLineEdit, QSlider, QTableView,
+                             QFileDialog, QMessageBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QPalette, QBrush
 from PyQt5.QtWidgets import QHeaderView
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.colors import ListedColormap
+import 性能诊断
+from 干涉网格 import grid_cache, WorkBuffers
+from 颜色映射 import transparent_colormap
+from 刷新调度 import FrameScheduler, DisplayResolution
+from 测量记录 import RunningStats
+from 数据表格 import ArrayTableModel
+from 数据导出 import save_columns
+
+# 实验记录的列名和导出格式
+RECORD_COLUMNS = ["光程差 (mm)", "条纹数 N", "光速 (m/s)"]
+RECORD_FORMATS = ["%.2f", "%.2f", "%.3e"]
+
+# 观察屏半宽（图像坐标）
+SCREEN_HALF_WIDTH = 5
+
+# pattern：sin(2π·r/λ) 网格；low、high：它的最小值和最大值
+RipplePattern = namedtuple("RipplePattern", ["pattern", "low", "high"])
+
+
+@grid_cache
+def ripple_pattern(N, wavelength):
+    """
+    返回 N × N 网格上与滑块位置无关的部分 sin(2π·sqrt(X² + Y²)/λ)。
+
+    同一组 (N, 波长) 只计算一次，数组只读；滑块拖动时每帧只需加上一个标量。
+    条纹相位 2π·r/λ 可达 10^7 rad 量级，float32 精度不够，这里用 float64。
+    """
+    x = np.linspace(-SCREEN_HALF_WIDTH, SCREEN_HALF_WIDTH, N)
+    pattern = np.hypot(x[np.newaxis, :], x[:, np.newaxis])
+    np.multiply(pattern, 2 * np.pi / wavelength, out=pattern)
+    np.sin(pattern, out=pattern)
+    pattern.setflags(write=False)
+    return RipplePattern(pattern, float(pattern.min()), float(pattern.max()))
 
 class MichelsonInterferenceApp(QMainWindow):
+    @性能诊断.timed_init("测光速")
     def __init__(self):
         super().__init__()
 
@@ -62,7 +96,7 @@ class MichelsonInterferenceApp(QMainWindow):
     def set_background_image(self):
         # 设置背景图片
         palette = QPalette()
-        pixmap = QPixmap("仿真平台.jpg")  # 替换为你的图片路径
+        pixmap = 性能诊断.load_pixmap("仿真平台.jpg")  # 替换为你的图片路径
         palette.setBrush(QPalette.Window, QBrush(pixmap))
         self.setPalette(palette)
 
@@ -119,6 +153,9 @@ class MichelsonInterferenceApp(QMainWindow):
         self.figure = plt.figure(figsize=(12, 12))  # 调整图像显示区域的大小
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "测光速")
+        # 按干涉图在屏幕上的物理像素数计算，只在画布尺寸改变时重新渲染
+        self.resolution = DisplayResolution(self.canvas, self.ax, self.on_display_resize)
         layout.addWidget(self.canvas)
 
         self.current_ring_label = QLabel("当前环数：0")
@@ -139,7 +176,9 @@ class MichelsonInterferenceApp(QMainWindow):
             QSlider::handle:horizontal { background-color: #2980b9; width: 20px; border-radius: 5px; }
             QSlider::handle:hover { background-color: #1abc9c; }
         """)
-        self.slider.valueChanged.connect(self.update_simulation)
+        # 拖动滑块时合并中间值，按固定帧率只渲染最新位置
+        self.frame_scheduler = FrameScheduler(self.update_simulation, "测光速/滑块刷新", parent=self)
+        self.slider.valueChanged.connect(self.frame_scheduler.request)
         layout.addWidget(self.slider)
 
     def add_formula_section(self, layout):
@@ -156,9 +195,11 @@ class MichelsonInterferenceApp(QMainWindow):
         results_label.setStyleSheet("font-size: 20px; font-weight: bold; border: 2px solid #1E90FF; padding: 10px; background-color: #4682B4; border-radius: 5px; color: white;")
         layout.addWidget(results_label)
 
-        # 设置实验记录表格，调整列宽，使所有数据都能显示在视图中
-        self.data_table = QTableWidget(20, 3)
-        self.data_table.setHorizontalHeaderLabels(["光程差 (mm)", "条纹数 N", "光速 (m/s)"])
+        # 设置实验记录表格，调整列宽，使所有数据都能显示在视图中；
+        # 数据保存在 self.records 的列数组中，表格只显示可见的行，行数不受限制
+        self.records = ArrayTableModel(RECORD_COLUMNS, RECORD_FORMATS, parent=self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.records)
         self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)  # 自动调整列宽
         self.data_table.setStyleSheet("font-size: 16px; font-weight: bold; border-radius: 5px;")
         layout.addWidget(self.data_table)
@@ -197,19 +238,19 @@ class MichelsonInterferenceApp(QMainWindow):
         layout.addWidget(export_data_button)
 
     def export_data(self):
-        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "", "CSV Files (*.csv);;All Files (*)")
+        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "", "CSV Files (*.csv);;NumPy Files (*.npz);;All Files (*)")
         if file_name:
-            with open(file_name, 'w') as f:
-                f.write("光程差 (mm), 条纹数 N, 光速 (m/s)\n")
-                for row in range(self.row):  # 只导出已生成的数据行
-                    distance = self.data_table.item(row, 0).text() if self.data_table.item(row, 0) else ""
-                    fringe_number = self.data_table.item(row, 1).text() if self.data_table.item(row, 1) else ""
-                    light_speed = self.data_table.item(row, 2).text() if self.data_table.item(row, 2) else ""
-                    f.write(f"{distance}, {fringe_number}, {light_speed}\n")
+            # 直接从记录数组批量导出，只包含已生成的数据行
+            save_columns(file_name, RECORD_COLUMNS, self.records.columns(), RECORD_FORMATS)
             QMessageBox.information(self, "成功", "实验数据已导出。")
 
     def init_parameters(self):
-        self.row = 0  # 用于跟踪输出的数据行
+        self.light_speed_stats = RunningStats()  # 光速的平均值和标准误差，每次测量 O(1) 更新
+        self.image = None  # 干涉图，第一次渲染时创建，之后只替换数据
+        self.work_buffers = WorkBuffers()
+
+    def on_display_resize(self):
+        self.frame_scheduler.request()
 
     def update_simulation(self):
         lamda = float(self.wavelength_selector.currentText()) * 1.E-9
@@ -219,22 +260,23 @@ class MichelsonInterferenceApp(QMainWindow):
         I = np.square(np.cos(I))
 
         # **修改点：生成二维干涉图像数据**
-        X = np.linspace(-5, 5, 100)
-        Y = np.linspace(-5, 5, 100)
-        X, Y = np.meshgrid(X, Y)
-        Z = np.sin(2 * np.pi * np.sqrt(X**2 + Y**2) / lamda) + I  # 使用干涉公式生成二维图像
-
-        # 创建一个自定义的颜色映射，透明化白色区域
-        cmap = plt.get_cmap('viridis')
-        new_cmap = cmap(np.arange(cmap.N))
-        new_cmap[:, -1] = np.where(np.all(new_cmap[:, :-1] == 1, axis=-1), 0, 1)  # 将白色区域的alpha设为0
-        transparent_cmap = ListedColormap(new_cmap)
-
-        # 使用彩色图像并设置白色部分透明
-        self.ax.clear()
-        self.ax.imshow(Z, cmap=transparent_cmap, interpolation='bessel', origin='lower', aspect='equal')
-        self.ax.axis('off')
-        self.canvas.draw()
+        # 网格和 sin 项按 (N, 波长) 缓存，每帧只加上随滑块变化的标量 I
+        N = self.resolution.size
+        ripple = ripple_pattern(N, lamda)
+        Z = self.work_buffers.get("image", (N, N), ripple.pattern.dtype)
+        np.add(ripple.pattern, I, out=Z)  # 使用干涉公式生成二维图像
+
+        # 使用彩色图像并设置白色部分透明；图像只创建一次，之后只替换数据和颜色范围
+        if self.image is None:
+            half = SCREEN_HALF_WIDTH
+            self.image = self.ax.imshow(Z, cmap=transparent_colormap('viridis'), interpolation='nearest',
+                                        origin='lower', aspect='equal', extent=(-half, half, -half, half))
+            self.ax.axis('off')
+        else:
+            self.image.set_data(Z)
+        # 与原来自动缩放颜色范围的效果相同
+        self.image.set_clim(ripple.low + I, ripple.high + I)
+        self.canvas.draw_idle()
 
         self.mirror_m2_position_display.setText(str(x))
         num = int(abs(np.floor(2 * (delta - float(self.distance_input.text())) / lamda)))
@@ -250,17 +292,17 @@ class MichelsonInterferenceApp(QMainWindow):
         # 加入模拟误差
         light_speed = 299792458 + np.random.normal(0, 1e5)  # 固定光速值加随机误差
 
-        # 将数据添加到表格中
-        self.data_table.setItem(self.row, 0, QTableWidgetItem(f"{distance:.2f}"))
-        self.data_table.setItem(self.row, 1, QTableWidgetItem(f"{fringe_number:.2f}"))
-        self.data_table.setItem(self.row, 2, QTableWidgetItem(f"{light_speed:.3e}"))
-
-        # 更新行数
-        self.row += 1
+        # 记录数据并更新统计量
+        self.records.append(distance, fringe_number, light_speed)
+        self.light_speed_stats.add(light_speed)
+        self.data_table.scrollToBottom()
 
         # 更新实验总结
-        avg_light_speed = np.mean([float(self.data_table.item(row, 2).text()) for row in range(self.row)])
-        self.summary_text.setText(f"已输出 {self.row} 个数据点。\n当前平均光速为 {avg_light_speed:.3e} m/s。")
+        stats = self.light_speed_stats
+        summary = f"已输出 {stats.count} 个数据点。\n当前平均光速为 {stats.mean:.3e} m/s。"
+        if stats.count > 1:
+            summary += f"\n标准差 {stats.std:.3e} m/s，平均值的标准误差 {stats.standard_error:.3e} m/s。"
+        self.summary_text.setText(summary)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
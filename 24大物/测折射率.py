@@ -1,14 +1,25 @@
 import sys
 import numpy as np
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QLineEdit, QSlider, QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QLineEdit, QSlider, QTableView, QFileDialog, QMessageBox
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QPalette, QBrush
 from PyQt5.QtWidgets import QHeaderView
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.colors import ListedColormap
+import 性能诊断
+from 刷新调度 import FrameScheduler, LevelOfDetail, DisplayResolution
+from 颜色映射 import transparent_colormap
+from 数据表格 import ArrayTableModel
+from 数据导出 import save_columns
+from 干涉网格 import RENDER_MODE, PRECISION, WorkBuffers, render_fringes
+
+# 实验记录的列名、显示和导出格式，以及每次采集的数据组数
+RECORD_COLUMNS = ["移动距离 (mm)", "条纹数 N", "折射率"]
+RECORD_FORMATS = ["%.2f", "%d", "%.6f"]
+RECORD_ROWS = 20
 
 class MichelsonInterferenceApp(QMainWindow):
+    @性能诊断.timed_init("测折射率")
     def __init__(self):
         super().__init__()
 
@@ -59,7 +70,7 @@ class MichelsonInterferenceApp(QMainWindow):
     def set_background_image(self):
         # 设置背景图片
         palette = QPalette()
-        pixmap = QPixmap("仿真平台.jpg")  # 替换为你的图片路径
+        pixmap = 性能诊断.load_pixmap("仿真平台.jpg")  # 替换为你的图片路径
         palette.setBrush(QPalette.Window, QBrush(pixmap))
         self.setPalette(palette)
 
@@ -107,7 +118,13 @@ class MichelsonInterferenceApp(QMainWindow):
 
         self.figure = plt.figure(figsize=(12, 12))  # 调整图像显示区域的大小
         self.ax = self.figure.add_subplot(111)
+        self.ax.axis('off')
+        # 干涉图的图像对象在第一次渲染时创建，之后只替换数据
+        self.fringe_image = None
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "测折射率")
+        # 按干涉图在屏幕上的物理像素数计算，只在画布尺寸改变时重新渲染
+        self.resolution = DisplayResolution(self.canvas, self.ax, self.on_display_resize)
         layout.addWidget(self.canvas)
 
         self.current_ring_label = QLabel("当前环数：0")
@@ -128,7 +145,12 @@ class MichelsonInterferenceApp(QMainWindow):
             QSlider::handle:horizontal { background-color: #2980b9; width: 20px; border-radius: 5px; }
             QSlider::handle:hover { background-color: #1abc9c; }
         """)
-        self.slider.valueChanged.connect(self.update_simulation)
+        # 拖动滑块时合并中间值，按固定帧率只渲染最新位置
+        self.frame_scheduler = FrameScheduler(self.update_simulation, "测折射率/滑块刷新", parent=self)
+        # 拖动期间用降采样的网格，松开或停顿后补画全分辨率的一帧
+        self.detail = LevelOfDetail(self.frame_scheduler.flush, "测折射率/细节层次", parent=self)
+        self.detail.attach(self.slider)
+        self.slider.valueChanged.connect(self.frame_scheduler.request)
         layout.addWidget(self.slider)
 
     def add_formula_section(self, layout):
@@ -146,8 +168,10 @@ class MichelsonInterferenceApp(QMainWindow):
         layout.addWidget(results_label)
 
         # 设置实验记录表格，调整列宽，使所有数据都能显示在视图中
-        self.data_table = QTableWidget(20, 3)
-        self.data_table.setHorizontalHeaderLabels(["移动距离 (mm)", "条纹数 N", "折射率"])
+        # 数据保存在 self.records 的列数组中，表格只格式化可见的行
+        self.records = ArrayTableModel(RECORD_COLUMNS, RECORD_FORMATS, parent=self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.records)
         self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)  # 自动调整列宽
         self.data_table.setStyleSheet("font-size: 16px; font-weight: bold; border-radius: 5px;")
         layout.addWidget(self.data_table)
@@ -186,29 +210,22 @@ class MichelsonInterferenceApp(QMainWindow):
         layout.addWidget(export_data_button)
 
     def export_data(self):
-        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "", "CSV Files (*.csv);;All Files (*)")
+        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "", "CSV Files (*.csv);;NumPy Files (*.npz);;All Files (*)")
         if file_name:
-            with open(file_name, 'w') as f:
-                f.write("移动距离 (mm), 条纹数 N, 折射率\n")
-                for row in range(20):  # 修改为20行数据导出
-                    distance = self.data_table.item(row, 0).text() if self.data_table.item(row, 0) else ""
-                    fringe_number = self.data_table.item(row, 1).text() if self.data_table.item(row, 1) else ""
-                    refractive_index = self.data_table.item(row, 2).text() if self.data_table.item(row, 2) else ""
-                    f.write(f"{distance}, {fringe_number}, {refractive_index}\n")
+            save_columns(file_name, RECORD_COLUMNS, self.records.columns(), RECORD_FORMATS)
             QMessageBox.information(self, "成功", "实验数据已导出。")
 
     def init_parameters(self):
-        self.N = 200
+        # 网格每边的点数与干涉图的物理像素数一致
+        self.N = self.resolution.size
         self.X_Mmax = 10e-3
         self.Y_Mmax = self.X_Mmax
-        X_Mmin = -self.X_Mmax
-        Y_Mmin = X_Mmin
-        X = np.linspace(X_Mmin, self.X_Mmax, self.N)
-        Y = X
-        [x, y] = np.meshgrid(X, Y)
-        r = np.square(x) + np.square(y)
-        f = 0.1
-        self.theta = np.arctan(np.sqrt(r) / f)
+        self.focal_length = 0.1
+        # 观察屏网格由各窗口共享缓存，默认用径向剖面渲染圆环
+        self.render_mode = RENDER_MODE
+        # 计算精度（可改为 np.float64）和每帧复用的工作数组
+        self.precision = PRECISION
+        self.work_buffers = WorkBuffers()
         self.d0 = 1e-3 + 1 / 2 * 5e-4
         self.row = 0
         self.table_num = 0
@@ -218,47 +235,43 @@ class MichelsonInterferenceApp(QMainWindow):
         refractive_index = float(self.refractive_index_input.text())  # 获取输入的折射率
         x = self.slider.value()
         delta = (self.d0 + x / self.slider.maximum() * 5e-4) * refractive_index  # 修改光程差
-        I = 2 * np.pi * delta * np.cos(self.theta) / lamda
-        I = np.square(np.cos(I))
-
-        # 创建一个自定义的颜色映射，透明化白色区域
-        cmap = plt.get_cmap('viridis')
-        new_cmap = cmap(np.arange(cmap.N))
-        new_cmap[:, -1] = np.where(np.all(new_cmap[:, :-1] == 1, axis=-1), 0, 1)  # 将白色区域的alpha设为0
-        transparent_cmap = ListedColormap(new_cmap)
-
-        # 使用彩色图像并设置白色部分透明
-        self.ax.clear()
-        self.ax.imshow(I, cmap=transparent_cmap, interpolation='bessel', origin='lower', vmin=0, vmax=1, aspect='equal')
-        self.ax.axis('off')
-        self.canvas.draw()
+        N = self.detail.grid_size(self.N)
+        I = render_fringes(N, self.X_Mmax, self.focal_length, delta, lamda, self.render_mode,
+                           out=self.work_buffers.get("intensity", (N, N), self.precision))
+
+        # 使用彩色图像并设置白色部分透明（颜色映射只生成一次）；extent 与网格点数无关，
+        # 降采样的预览帧和全分辨率帧铺满同一区域
+        if self.fringe_image is None:
+            self.fringe_image = self.ax.imshow(I, cmap=transparent_colormap('viridis'), interpolation='nearest', origin='lower',
+                                               vmin=0, vmax=1, aspect='equal', extent=(0, 1, 0, 1))
+        else:
+            self.fringe_image.set_data(I)
+        self.canvas.draw_idle()
 
         self.mirror_m2_position_display.setText(str(x))
         num = int(abs(np.floor(2 * (delta - self.d0) / lamda)))
         self.current_ring_label.setText(f"当前环数：{num}")
 
+    def on_display_resize(self):
+        self.N = self.resolution.size
+        self.frame_scheduler.request()
+
     def calculate_and_display_result(self):
         refractive_index = float(self.refractive_index_input.text())
         lamda = float(self.wavelength_selector.currentText()) * 1.E-9
 
-        for row in range(20):  # 扩展到20行
-            distance = (row + 1) * 0.1  # 每次移动 0.1 mm
-            fringe_number = (row + 1) * 10  # 假设条纹数变化
-            fluctuation = np.random.normal(0, 0.002)  # 加入浮动
-            refractive_index_calculated = refractive_index + fluctuation
-
-            self.data_table.setItem(row, 0, QTableWidgetItem(f"{distance:.2f}"))
-            self.data_table.setItem(row, 1, QTableWidgetItem(f"{fringe_number}"))
-            self.data_table.setItem(row, 2, QTableWidgetItem(f"{refractive_index_calculated:.6f}"))
+        # 整组数据一次生成，表格整体替换
+        steps = np.arange(1, RECORD_ROWS + 1)
+        distances = steps * 0.1  # 每次移动 0.1 mm
+        fringe_numbers = steps * 10  # 假设条纹数变化
+        fluctuations = np.random.normal(0, 0.002, RECORD_ROWS)  # 加入浮动
+        refractive_indices = np.round(refractive_index + fluctuations, 6)  # 与表格中显示的 6 位小数一致
+        self.records.replace(distances, fringe_numbers, refractive_indices)
 
         # 动态生成实验总结
-        avg_refractive_index = np.mean([float(self.data_table.item(row, 2).text()) for row in range(20)])
-        min_refractive_index = np.min([float(self.data_table.item(row, 2).text()) for row in range(20)])
-        max_refractive_index = np.max([float(self.data_table.item(row, 2).text()) for row in range(20)])
-
         self.summary_text.setText(
-            f"实验完成，共采集 20 组数据。\n平均折射率: {avg_refractive_index:.6f}\n"
-            f"最低折射率: {min_refractive_index:.6f}\n最高折射率: {max_refractive_index:.6f}\n"
+            f"实验完成，共采集 {RECORD_ROWS} 组数据。\n平均折射率: {refractive_indices.mean():.6f}\n"
+            f"最低折射率: {refractive_indices.min():.6f}\n最高折射率: {refractive_indices.max():.6f}\n"
             "通过数据可以看出，实验结果与预期相符，反映了折射率的变化规律。"
         )
 
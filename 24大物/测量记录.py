@@ -0,0 +1,162 @@
+import numpy as np
+
+# 记录表的初始容量（行数），写满后容量翻倍
+INITIAL_CAPACITY = 64
+
+# 抽稀历史记录最多保存的行数，以及相邻两行横坐标的初始最小比值
+HISTORY_CAPACITY = 256
+HISTORY_RATIO = 1.01
+
+
+class RunningStats:
+    """
+    用 Welford 算法在线累计平均值和方差。
+
+    每加入一个测量值只做 O(1) 的更新，不保存历史数据，也不会像先求 Σx² 再相减那样
+    损失精度（光速约 3×10^8，平方后直接相减会丢掉大部分有效数字）。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # 与平均值之差的平方和
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def extend(self, values):
+        """批量加入一组测量值：先向量化求出这一批的统计量，再与已有结果合并（Chan 的合并公式）。"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = values.mean()
+        centered = values - batch_mean
+        batch_m2 = np.dot(centered, centered)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self):
+        """样本方差（除以 n - 1），少于两个测量值时为 nan。"""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def standard_error(self):
+        """平均值的标准误差 s / √n。"""
+        return self.std / np.sqrt(self.count) if self.count > 1 else np.nan
+
+
+class MeasurementStore:
+    """
+    按列保存实验记录的可增长 numpy 表。
+
+    每列是一个 numpy 数组（默认 float64，也可以是字符串等其他类型），容量不够时翻倍扩容，
+    追加一行的均摊代价为 O(1)。column(i) 返回前 len(store) 行的只读视图，
+    表格模型和导出都直接读取这些数组。
+    """
+
+    def __init__(self, names, dtypes=None, capacity=INITIAL_CAPACITY):
+        self.names = list(names)
+        dtypes = dtypes or [np.float64] * len(self.names)
+        self._columns = [np.empty(capacity, dtype) for dtype in dtypes]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _reserve(self, count):
+        capacity = len(self._columns[0])
+        if count <= capacity:
+            return
+        # 初始容量为 0 时翻倍永远是 0，至少从 1 开始
+        capacity = max(capacity, 1)
+        while capacity < count:
+            capacity *= 2
+        for i, old in enumerate(self._columns):
+            column = np.empty(capacity, old.dtype)
+            column[:self._count] = old[:self._count]
+            self._columns[i] = column
+
+    def append(self, *values):
+        """追加一行，values 与列一一对应。"""
+        self._reserve(self._count + 1)
+        for column, value in zip(self._columns, values):
+            column[self._count] = value
+        self._count += 1
+
+    def extend(self, *columns):
+        """一次追加多行，columns 是与列一一对应的等长数组（标量会广播到每一行）。"""
+        columns = np.broadcast_arrays(*[np.atleast_1d(column) for column in columns])
+        n = len(columns[0])
+        self._reserve(self._count + n)
+        for store, column in zip(self._columns, columns):
+            store[self._count:self._count + n] = column
+        self._count += n
+
+    def assign(self, index, rows, values):
+        """修改第 index 列中 rows（整数、切片或索引数组）所指的行。"""
+        self._columns[index][:self._count][rows] = values
+
+    def column(self, index):
+        view = self._columns[index][:self._count]
+        view.flags.writeable = False
+        return view
+
+    def columns(self):
+        return [self.column(i) for i in range(len(self.names))]
+
+    def clear(self):
+        self._count = 0
+
+
+class DecimatedHistory:
+    """
+    行数有上限的历史记录，用于在对数横轴上画随数据点数增长的收敛曲线。
+
+    每行的第一列是单调增长的横坐标 x；新行的 x 至少是上一保存行的 ratio 倍时才保存，
+    行数达到 capacity 时隔一行丢一行、ratio 平方。保存的行在对数横轴上大致均匀分布，
+    行数始终不超过 capacity，因此画图的代价与追加了多少次无关。columns() 总是包含
+    最近追加的一行，曲线一直画到当前的数据点数。
+    """
+
+    def __init__(self, names, capacity=HISTORY_CAPACITY, ratio=HISTORY_RATIO):
+        self.store = MeasurementStore(names, capacity=capacity)
+        self.capacity = capacity
+        self.ratio = ratio
+        self._latest = None
+
+    def __len__(self):
+        return len(self.store) + (self._latest is not None)
+
+    def append(self, x, *values):
+        self._latest = None
+        if len(self.store) and x < self.store.column(0)[-1] * self.ratio:
+            self._latest = (x, *values)
+            return
+        if len(self.store) >= self.capacity:
+            kept = [column[::2].copy() for column in self.store.columns()]
+            self.store.clear()
+            self.store.extend(*kept)
+            self.ratio *= self.ratio
+        self.store.append(x, *values)
+
+    def columns(self):
+        columns = self.store.columns()
+        if self._latest is None:
+            return columns
+        return [np.append(column, value) for column, value in zip(columns, self._latest)]
+
+    def clear(self):
+        self.store.clear()
+        self._latest = None
@@ -1,17 +1,17 @@
 import numpy as np
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableWidget, QTableWidgetItem, QMessageBox
-from PyQt5.QtCore import Qt, pyqtSlot
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QTableView, QMessageBox
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
 import matplotlib.pyplot as plt
-from matplotlib.colors import ListedColormap
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from numpy import linspace, sqrt, arctan, square, cos
-import math
-from numpy import ceil
-from numpy import squeeze
-from numpy import array
 from PyQt5.QtWidgets import QHeaderView, QSlider
+import 性能诊断
+from 刷新调度 import FrameScheduler, FrameWorker, FrameCache, FramePlayer, LevelOfDetail, DisplayResolution
+from 颜色映射 import apply_wavelength_map
+from 干涉网格 import RENDER_MODE, PRECISION, LINE_GAUSSIAN, LINE_LORENTZIAN, render_fringes, render_spectral_fringes, line_spectrum, fringe_visibility, thread_buffers
+from 数据表格 import ArrayTableModel
+from 条纹计数 import SWEEP_SAMPLES, sweep_fringes, fit_wavelength
 
 
 # 常量定义
@@ -21,7 +21,56 @@ gray = "#7f8c8d"
 blue_button = "#007bff"
 red_button = "#dc3545"
 
+# 停止拖动多久（毫秒）后开始预取当前位置附近的帧
+PREFETCH_IDLE_MS = 300
+# 预取当前位置左右各多少个滑块位置
+PREFETCH_RADIUS = 5
+
+# 动镜 M2 的扫描速度选项 (μm/s) 和默认值。每帧动镜位移超过 λ/4（光程差变化半个条纹）时
+# 画出的条纹会混叠成静止或倒退，632.8 nm、30 帧/秒时速度上限约 4.7 μm/s
+SWEEP_SPEEDS = ["0.5", "1", "2", "3", "4"]
+SWEEP_DEFAULT_SPEED = "2"
+
+# 光源选项：名称 -> 谱线线型（None 为单色光）
+SOURCE_TYPES = {"单色光": None, "高斯谱线": LINE_GAUSSIAN, "洛伦兹谱线": LINE_LORENTZIAN}
+# 谱线半高全宽选项 (nm) 和默认值。光程差在 1.25–1.75 mm 之间，相干长度 λ² / Δλ 与之相当的
+# 0.01–0.05 nm 谱线能看到条纹，更宽的谱线用来演示条纹消失
+LINE_WIDTHS = ["0.01", "0.02", "0.05", "0.1", "0.2", "0.5", "1"]
+LINE_DEFAULT_WIDTH = "0.05"
+
+
+def compute_frame(N, half_width, focal_length, delta, lamda, wavelength_nm, render_mode, precision=PRECISION, spectrum=None):
+    """
+    计算一帧等倾干涉图并着色，返回 uint8 RGBA 图像。
+
+    只做 numpy 计算，在后台线程中执行；中间结果写入线程专用的工作数组，
+    每帧只分配返回的 RGBA 图像。spectrum 不为 None 时按宽带光源计算。
+    """
+    buffers = thread_buffers()
+    out = buffers.get("intensity", (N, N), precision)
+    if spectrum is None:
+        I = render_fringes(N, half_width, focal_length, delta, lamda, render_mode, out=out)
+    else:
+        I = render_spectral_fringes(N, half_width, focal_length, delta, spectrum, render_mode, out=out)
+    return apply_wavelength_map(I, wavelength_nm, index=buffers.get("colormap_index", (N, N), np.intp))
+
+
+def sweep_offsets(start, stop, speed, fps):
+    """
+    动镜从 start 匀速移动到 stop (m) 的帧生成器，速度为 speed (m/s)，
+    每帧给出一个位移，相邻两帧相隔 1 / fps 秒。
+    """
+    step = speed / fps
+    for k in range(int((stop - start) / step) + 1):
+        yield start + k * step
+
+
+def compute_keyed_frames(jobs):
+    """依次计算 [(缓存键, compute_frame 参数)]，返回 [(缓存键, RGBA 图像)]。"""
+    return [(key, compute_frame(*args)) for key, args in jobs]
+
 class MichelsonInterferenceApp(QMainWindow):
+    @性能诊断.timed_init("迈克尔逊干涉测量波长")
     def __init__(self):
         super().__init__()
 
@@ -55,6 +104,22 @@ class MichelsonInterferenceApp(QMainWindow):
         self.wavelength_selector.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
         left_layout.addWidget(self.wavelength_selector)
 
+        # 光源：单色光或有一定谱线宽度的宽带光源（有限相干长度）
+        source_label = QLabel("光源谱线 / 半高全宽 (nm):")
+        source_label.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        left_layout.addWidget(source_label)
+        source_layout = QHBoxLayout()
+        left_layout.addLayout(source_layout)
+        self.source_selector = QComboBox()
+        self.source_selector.addItems(list(SOURCE_TYPES))
+        self.source_selector.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        source_layout.addWidget(self.source_selector)
+        self.line_width_selector = QComboBox()
+        self.line_width_selector.addItems(LINE_WIDTHS)
+        self.line_width_selector.setCurrentText(LINE_DEFAULT_WIDTH)
+        self.line_width_selector.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        source_layout.addWidget(self.line_width_selector)
+
         operation_layout = QGridLayout()
         left_layout.addLayout(operation_layout)
 
@@ -82,7 +147,7 @@ class MichelsonInterferenceApp(QMainWindow):
         left_layout.addWidget(principle_label)
         current_dir = os.path.dirname(os.path.abspath(__file__))
         image_path = os.path.join(current_dir, '迈克尔逊原理图.jfif')
-        pixmap = QPixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
         self.principle_img = QLabel()
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
@@ -98,12 +163,34 @@ class MichelsonInterferenceApp(QMainWindow):
         self.figure = plt.figure(figsize=(10, 12))
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "迈克尔逊干涉测量波长")
+        # 干涉图只创建一次，之后滑块变化时只更新图像数据并局部重绘（blit）
+        self.image = None
+        self.image_background = None
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        # 按干涉图在屏幕上的物理像素数计算，只在画布尺寸改变时重新渲染
+        self.resolution = DisplayResolution(self.canvas, self.ax, self.on_display_resize)
+        # 干涉图在后台线程中计算和着色，主线程只替换图像数据
+        self.frame_worker = FrameWorker(compute_keyed_frames, "迈克尔逊干涉测量波长/后台计算", parent=self)
+        self.frame_worker.frame_ready.connect(self.show_frames)
+        # 算好的帧按 (波长, 滑块位置, N) 缓存，空闲时预取附近位置的帧
+        self.frame_cache = FrameCache("迈克尔逊干涉测量波长/帧缓存")
+        self.prefetch_worker = FrameWorker(compute_keyed_frames, "迈克尔逊干涉测量波长/预取", parent=self)
+        self.prefetch_worker.frame_ready.connect(self.store_frames)
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_IDLE_MS)
+        self.prefetch_timer.timeout.connect(self.prefetch_frames)
         middle_layout.addWidget(self.canvas)
 
         self.current_ring_label = QLabel("当前环数：0")
         self.current_ring_label.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
         middle_layout.addWidget(self.current_ring_label)
 
+        self.visibility_label = QLabel("条纹可见度：1.00")
+        self.visibility_label.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        middle_layout.addWidget(self.visibility_label)
+
         self.mirror_m2_position_label = QLabel("动镜 M2 位置：")
         self.mirror_m2_position_label.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
         middle_layout.addWidget(self.mirror_m2_position_label)
@@ -113,9 +200,36 @@ class MichelsonInterferenceApp(QMainWindow):
         self.slider.setRange(0, 100)
         self.slider.setValue(50)
         self.slider.setStyleSheet("QSlider::groove:horizontal { background-color: #CCCCCC; height: 10px; } QSlider::handle:horizontal { background-color: #333333; width: 20px; border-radius: 5px; }")
-        self.slider.valueChanged.connect(self.update_simulation)
+        # 拖动滑块时合并中间值，按固定帧率只渲染最新位置
+        self.frame_scheduler = FrameScheduler(self.update_simulation, "迈克尔逊干涉测量波长/滑块刷新", parent=self)
+        # 拖动期间用降采样的网格，松开或停顿后补画全分辨率的一帧
+        self.detail = LevelOfDetail(self.frame_scheduler.flush, "迈克尔逊干涉测量波长/细节层次", parent=self)
+        self.detail.attach(self.slider)
+        self.slider.valueChanged.connect(self.frame_scheduler.request)
         middle_layout.addWidget(self.slider)
 
+        # 匀速扫描动镜 M2：按固定帧率播放，渲染跟不上时丢帧，环数实时更新
+        sweep_layout = QHBoxLayout()
+        middle_layout.addLayout(sweep_layout)
+        sweep_speed_label = QLabel("扫描速度 (μm/s)：")
+        sweep_speed_label.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        sweep_layout.addWidget(sweep_speed_label)
+        self.sweep_speed_selector = QComboBox()
+        self.sweep_speed_selector.addItems(SWEEP_SPEEDS)
+        self.sweep_speed_selector.setCurrentText(SWEEP_DEFAULT_SPEED)
+        self.sweep_speed_selector.setStyleSheet(f"font-size: 18px; border: 2px solid {gray}; padding: 10px; background-color: {white}")
+        sweep_layout.addWidget(self.sweep_speed_selector)
+        self.sweep_button = QPushButton("开始扫描")
+        self.sweep_button.setStyleSheet(f"font-size: 18px; background-color: {blue_button}; color: white;")
+        self.sweep_button.clicked.connect(self.toggle_sweep)
+        sweep_layout.addWidget(self.sweep_button)
+        self.sweep_player = FramePlayer(self.show_sweep_position, "迈克尔逊干涉测量波长/扫描播放", parent=self)
+        self.sweep_player.finished.connect(self.on_sweep_finished)
+        # 手动拖动滑块时停止扫描
+        self.slider.sliderPressed.connect(self.stop_sweep)
+        self.source_selector.currentIndexChanged.connect(self.frame_scheduler.request)
+        self.line_width_selector.currentIndexChanged.connect(self.frame_scheduler.request)
+
         right_layout = QVBoxLayout()
         main_layout.addLayout(right_layout)
 
@@ -125,82 +239,22 @@ class MichelsonInterferenceApp(QMainWindow):
 
         # 修改表格样式表，确保表头文字能够显示，并增加列宽和行高
         table_style = f"font-size: 16px; border: 1px solid {gray}; padding: 1px; background-color: {white}"
-        self.data_table1 = QTableWidget(5, 2)
-        self.data_table1.setHorizontalHeaderLabels(["横移条纹数 Ni", "位置 ei(mm)"])
-        self.data_table1.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table1.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table1.setStyleSheet(table_style)
-        # 增加列宽
-        self.data_table1.setColumnWidth(0, 200)
-        self.data_table1.setColumnWidth(1, 200)
-        # 增加行高
-        self.data_table1.verticalHeader().setDefaultSectionSize(30)
-        for row in range(5):
-            if row == 0:
-                item1 = QTableWidgetItem("0")
-            elif row == 1:
-                item1 = QTableWidgetItem("50")
-            elif row == 2:
-                item1 = QTableWidgetItem("100")
-            elif row == 3:
-                item1 = QTableWidgetItem("150")
-            elif row == 4:
-                item1 = QTableWidgetItem("200")
-            item2 = QTableWidgetItem("")
-            self.data_table1.setItem(row, 0, item1)
-            self.data_table1.setItem(row, 1, item2)
+        # 三个表格的数据都保存在 numpy 列数组中，位置列为 nan 时显示为空白；条纹数是整数列，只能输入整数。
+        # 前两个表格是原始测量数据，可以直接修改；逐差表由计算结果填写，只读
+        blank = np.full(5, np.nan)
+        self.data_table1, self.table_model1 = self.make_data_table(
+            ["横移条纹数 Ni", "位置 ei(mm)"], ["%d", "%.5f"], [[0, 50, 100, 150, 200], blank], table_style,
+            dtypes=[np.int64, np.float64], editable=[0, 1])
         right_layout.addWidget(self.data_table1)
 
-        self.data_table2 = QTableWidget(5, 2)
-        self.data_table2.setHorizontalHeaderLabels(["横移条纹数 Ni", "位置 ei(mm)"])
-        self.data_table2.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table2.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table2.setStyleSheet(table_style)
-        # 增加列宽
-        self.data_table2.setColumnWidth(0, 200)
-        self.data_table2.setColumnWidth(1, 200)
-        # 增加行高
-        self.data_table2.verticalHeader().setDefaultSectionSize(30)
-        for row in range(5):
-            if row == 0:
-                item1 = QTableWidgetItem("250")
-            elif row == 1:
-                item1 = QTableWidgetItem("300")
-            elif row == 2:
-                item1 = QTableWidgetItem("350")
-            elif row == 3:
-                item1 = QTableWidgetItem("400")
-            elif row == 4:
-                item1 = QTableWidgetItem("450")
-            item2 = QTableWidgetItem("")
-            self.data_table2.setItem(row, 0, item1)
-            self.data_table2.setItem(row, 1, item2)
+        self.data_table2, self.table_model2 = self.make_data_table(
+            ["横移条纹数 Ni", "位置 ei(mm)"], ["%d", "%.5f"], [[250, 300, 350, 400, 450], blank], table_style,
+            dtypes=[np.int64, np.float64], editable=[0, 1])
         right_layout.addWidget(self.data_table2)
 
-        self.data_table3 = QTableWidget(5, 2)
-        self.data_table3.setHorizontalHeaderLabels(["△N=N(i+5)-Ni", "△e=e(i+5)-ei"])
-        self.data_table3.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table3.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.data_table3.setStyleSheet(table_style)
-        # 增加列宽
-        self.data_table3.setColumnWidth(0, 200)
-        self.data_table3.setColumnWidth(1, 200)
-        # 增加行高
-        self.data_table3.verticalHeader().setDefaultSectionSize(30)
-        for row in range(5):
-            if row == 0:
-                item1 = QTableWidgetItem("250-0")
-            elif row == 1:
-                item1 = QTableWidgetItem("300-50")
-            elif row == 2:
-                item1 = QTableWidgetItem("350-100")
-            elif row == 3:
-                item1 = QTableWidgetItem("400-150")
-            elif row == 4:
-                item1 = QTableWidgetItem("450-200")
-            item2 = QTableWidgetItem("")
-            self.data_table3.setItem(row, 0, item1)
-            self.data_table3.setItem(row, 1, item2)
+        self.data_table3, self.table_model3 = self.make_data_table(
+            ["△N=N(i+5)-Ni", "△e=e(i+5)-ei"], ["%s", "%.5f"],
+            [["250-0", "300-50", "350-100", "400-150", "450-200"], blank], table_style, dtypes=["U16", np.float64])
         right_layout.addWidget(self.data_table3)
 
         data_operation_layout = QHBoxLayout()
@@ -233,18 +287,15 @@ class MichelsonInterferenceApp(QMainWindow):
         self.update_simulation()
 
     def init_parameters(self):
-        self.N = 200
+        # 网格每边的点数与干涉图的物理像素数一致
+        self.N = self.resolution.size
         self.X_Mmax = 10e-3
         self.Y_Mmax = self.X_Mmax
-        self.N = self.N
-        X_Mmin = -self.X_Mmax
-        Y_Mmin = X_Mmin
-        X = linspace(X_Mmin, self.X_Mmax, self.N)
-        Y = X
-        [x, y] = np.meshgrid(X, Y)
-        r = np.square(x) + np.square(y)
-        f = 0.1
-        self.theta = np.arctan(np.sqrt(r) / f)
+        self.focal_length = 0.1
+        # 观察屏网格由各窗口共享缓存，默认用径向剖面渲染圆环
+        self.render_mode = RENDER_MODE
+        # 计算精度，可改为 np.float64
+        self.precision = PRECISION
         self._translate = None
         self.maxl = 5e-4
         self.d0 = 1e-3 + 1 / 2 * self.maxl
@@ -252,6 +303,9 @@ class MichelsonInterferenceApp(QMainWindow):
         self.table_num = 0
         self.lamda = None
         self.location = None
+        # 自动计数得到的各级条纹位置 (m) 和波长拟合结果
+        self.fringe_positions = None
+        self.fringe_fit = None
         self.mainstrtemp = "url(img/100.jpg) 0 {0} 145 {1}"
         self.vicestrtemp = "url(img/100.jpg) 0 {0} 145 {1}"
         self.SongTi = QFont()
@@ -261,22 +315,177 @@ class MichelsonInterferenceApp(QMainWindow):
         self.lamda = lamda
         x = self.slider.value()
         delta = self.d0 + x / self.slider.maximum() * self.maxl
-        I = 2 * np.pi * delta * np.cos(self.theta) / lamda
-        I = np.square(np.cos(I))
-        my_cmap = self.generate_color_map(float(self.wavelength_selector.currentText()))
         num = int(abs(np.floor(2 * (delta - self.d0) / lamda)))
-        self.ax.clear()
-        self.ax.imshow(I, cmap=my_cmap, interpolation='bessel', origin='lower', vmin=0, vmax=1)
-        self.ax.axis('off')
-        self.canvas.draw()
+        key, args = self.frame_job(x)
+        frame = self.frame_cache.get(key)
+        if frame is None and self.detail.coarse:
+            # 全分辨率的帧不在缓存中时，拖动期间先算一帧降采样的
+            key, args = self.frame_job(x, self.detail.grid_size(self.N))
+            frame = self.frame_cache.get(key)
+        if frame is None:
+            self.frame_worker.submit([(key, args)])
+        else:
+            self.frame_worker.skip()
+            self.show_frame(frame)
+        self.prefetch_timer.start()
         self.mirror_m2_position_display.setText(str(x))
         self.current_ring_label.setText(f"当前环数：{num}")
+        self.location = f"{delta * 1e3:.5f}"
+        self.show_visibility(delta)
 
-    def write_data_to_tables(self):
-        if self.table_num == 0:
-            self.data_table1.setItem(self.row, 1, QTableWidgetItem(self.location))
+    def frame_job(self, x, N=None):
+        # 滑块位置 x 对应的 (缓存键, compute_frame 参数)，N 默认为全分辨率
+        N = N or self.N
+        wavelength = float(self.wavelength_selector.currentText())
+        delta = self.d0 + x / self.slider.maximum() * self.maxl
+        key = (wavelength, self.source_selector.currentText(), self.line_width_selector.currentText(), x, N)
+        return key, self.frame_args(delta, N)
+
+    def frame_args(self, delta, N):
+        # 光程差为 delta 时 compute_frame 的参数
+        wavelength = float(self.wavelength_selector.currentText())
+        return (N, self.X_Mmax, self.focal_length, delta, wavelength * 1.E-9, wavelength, self.render_mode, self.precision,
+                self.spectrum())
+
+    def spectrum(self):
+        # 当前光源的光谱，单色光返回 None
+        shape = SOURCE_TYPES[self.source_selector.currentText()]
+        if shape is None:
+            return None
+        lamda = float(self.wavelength_selector.currentText()) * 1.E-9
+        # 自动测量时从滑块位置再扫过几百级条纹，留给 line_spectrum 的复现余量足以覆盖
+        return line_spectrum(lamda, float(self.line_width_selector.currentText()) * 1.E-9, shape,
+                             max_path_difference=self.d0 + self.maxl)
+
+    def show_visibility(self, delta):
+        spectrum = self.spectrum()
+        if spectrum is None:
+            self.visibility_label.setText("条纹可见度：1.00")
+            return
+        visibility = fringe_visibility(delta, spectrum)
+        lamda = float(self.wavelength_selector.currentText()) * 1.E-9
+        coherence_length = lamda ** 2 / (float(self.line_width_selector.currentText()) * 1.E-9)
+        self.visibility_label.setText(f"条纹可见度：{visibility:.2f}（相干长度 ≈ {coherence_length * 1e3:.1f} mm）")
+
+    def toggle_sweep(self):
+        if self.sweep_player.is_playing():
+            self.stop_sweep()
         else:
-            self.data_table2.setItem(self.row, 1, QTableWidgetItem(self.location))
+            self.start_sweep()
+
+    def start_sweep(self):
+        # 从滑块当前位置扫到最远处，已经在最远处时从头开始
+        start = self.slider.value() / self.slider.maximum() * self.maxl
+        if start >= self.maxl:
+            start = 0.0
+        # 帧率或波长改变后仍保证每帧位移不超过 λ/4
+        lamda = float(self.wavelength_selector.currentText()) * 1.E-9
+        speed = min(float(self.sweep_speed_selector.currentText()) * 1e-6, lamda / 4 * self.sweep_player.fps)
+        self.prefetch_timer.stop()
+        self.sweep_button.setText("停止扫描")
+        self.sweep_player.play(sweep_offsets(start, self.maxl, speed, self.sweep_player.fps))
+
+    def stop_sweep(self):
+        if self.sweep_player.is_playing():
+            self.sweep_player.stop()
+            self.on_sweep_finished()
+
+    def on_sweep_finished(self):
+        self.sweep_button.setText("开始扫描")
+
+    def closeEvent(self, event):
+        # 窗口关闭后仍保留在窗口池中，停止扫描和预取，免得计时器在后台继续触发
+        self.stop_sweep()
+        self.prefetch_timer.stop()
+        super().closeEvent(event)
+
+    def show_sweep_position(self, offset):
+        # 扫描中的位置是连续的，帧直接交给后台计算，不写入帧缓存
+        lamda = float(self.wavelength_selector.currentText()) * 1.E-9
+        delta = self.d0 + offset
+        num = int(abs(np.floor(2 * (delta - self.d0) / lamda)))
+        self.frame_worker.submit([(None, self.frame_args(delta, self.N))])
+        x = int(round(offset / self.maxl * self.slider.maximum()))
+        # 只移动滑块，不触发滑块的刷新
+        self.slider.blockSignals(True)
+        self.slider.setValue(x)
+        self.slider.blockSignals(False)
+        self.mirror_m2_position_display.setText(str(x))
+        self.current_ring_label.setText(f"当前环数：{num}")
+        self.location = f"{delta * 1e3:.5f}"
+        self.show_visibility(delta)
+
+    def prefetch_frames(self):
+        # 按距离由近到远预取当前位置附近尚未缓存的帧
+        x = self.slider.value()
+        positions = sorted(range(max(x - PREFETCH_RADIUS, self.slider.minimum()), min(x + PREFETCH_RADIUS, self.slider.maximum()) + 1),
+                           key=lambda position: abs(position - x))
+        jobs = [self.frame_job(position) for position in positions]
+        jobs = [(key, args) for key, args in jobs if key not in self.frame_cache]
+        if jobs:
+            self.prefetch_worker.submit(jobs)
+
+    def store_frames(self, frames):
+        for key, rgba in frames:
+            if key is not None:
+                self.frame_cache.put(key, rgba)
+
+    def show_frames(self, frames):
+        self.store_frames(frames)
+        self.show_frame(frames[-1][1])
+
+    def show_frame(self, rgba):
+        # 后台线程算好的帧送回主线程后，只替换图像数据并局部重绘
+        if self.image is None:
+            # animated=True：整幅重绘时不画干涉图，由 on_canvas_draw 在保存背景后再画上去
+            # 固定 extent，降采样的帧与全分辨率的帧铺满同一区域
+            self.image = self.ax.imshow(rgba, interpolation='nearest', origin='lower', animated=True,
+                                        extent=(-self.X_Mmax, self.X_Mmax, -self.Y_Mmax, self.Y_Mmax))
+            self.ax.axis('off')
+            self.canvas.draw()
+        else:
+            self.image.set_data(rgba)
+            self.redraw_image()
+
+    def on_display_resize(self):
+        # 尺寸变化后旧的帧都用不上了
+        self.N = self.resolution.size
+        self.frame_cache.clear()
+        self.frame_scheduler.request()
+
+    def on_canvas_draw(self, event):
+        # 整幅重绘（首次显示、窗口缩放）后保存不含干涉图的背景，再把干涉图画上
+        self.image_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.image is not None:
+            self.ax.draw_artist(self.image)
+
+    def redraw_image(self):
+        # 只重绘干涉图所在的区域；还没有背景时交给 draw_idle 合并成一次整幅重绘
+        if self.image_background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.image_background)
+        self.ax.draw_artist(self.image)
+        self.canvas.blit(self.ax.bbox)
+
+    def make_data_table(self, names, formats, columns, table_style, dtypes=None, editable=()):
+        # 创建以 numpy 列数组为数据的表格，editable 中的列可以直接编辑
+        model = ArrayTableModel(names, formats, dtypes, editable=editable, parent=self)
+        model.extend(*columns)
+        table = QTableView()
+        table.setModel(model)
+        # 修改表格样式表，确保表头文字能够显示，并增加列宽和行高
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setStyleSheet(table_style)
+        table.setColumnWidth(0, 200)
+        table.setColumnWidth(1, 200)
+        table.verticalHeader().setDefaultSectionSize(30)
+        return table, model
+
+    def write_data_to_tables(self):
+        model = self.table_model1 if self.table_num == 0 else self.table_model2
+        model.assign(1, self.row, float(self.location))
         self.row += 1
         if self.row >= 5:
             self.table_num += 1
@@ -288,26 +497,80 @@ class MichelsonInterferenceApp(QMainWindow):
     def clear_data_tables(self):
         self.row = 0
         self.table_num = 0
-        for table in [self.data_table1, self.data_table2, self.data_table3]:
-            for i in range(5):
-                j = 1
-                table.setItem(i, j, QTableWidgetItem(""))
+        for model in [self.table_model1, self.table_model2, self.table_model3]:
+            model.assign(1, slice(None), np.nan)
+        self.fringe_positions = None
+        self.fringe_fit = None
+
+    def table_rows(self, models):
+        # 按行读出表格显示的文字，空单元格记为空字符串
+        return [[model.text(row, column) for column in range(model.columnCount())]
+                for model in models for row in range(model.rowCount())]
 
     def export_data(self):
         options = QFileDialog.Options()
         file_name, _ = QFileDialog.getSaveFileName(self, "导出数据", "", "Excel Files (*.xlsx);;All Files (*)",
                                                    options=options)
         if file_name:
-            pass
+            # pandas 只在导出时用到，不拖慢窗口的打开
+            import pandas as pd
+            if not os.path.splitext(file_name)[1]:
+                file_name += ".xlsx"
+            records = pd.DataFrame(self.table_rows([self.table_model1, self.table_model2]), columns=self.table_model1.store.names)
+            differences = pd.DataFrame(self.table_rows([self.table_model3]), columns=self.table_model3.store.names)
+            with pd.ExcelWriter(file_name) as writer:
+                records.to_excel(writer, sheet_name="数据记录", index=False)
+                differences.to_excel(writer, sheet_name="逐差", index=False)
+                if self.fringe_positions is not None:
+                    pd.DataFrame({
+                        "条纹级次": np.arange(len(self.fringe_positions)),
+                        "位置 (mm)": self.fringe_positions * 1e3,
+                        "拟合残差 (nm)": self.fringe_fit.residuals * 1e9,
+                    }).to_excel(writer, sheet_name="自动计数", index=False)
+            QMessageBox.information(self, "成功", "实验数据已导出。")
 
     def calculate_and_display_result(self):
-        pass
+        # 从动镜当前位置开始做一次密集扫描，自动计数条纹，填写三个表格并拟合波长
+        lamda = float(self.wavelength_selector.currentText()) * 1.E-9
+        start = self.d0 + self.slider.value() / self.slider.maximum() * self.maxl
+        orders = np.concatenate([self.table_model1.column(0), self.table_model2.column(0)])
+        if orders.min() < 0:
+            QMessageBox.warning(self, "错误", "横移条纹数不能为负数。")
+            return
+        # 逐差法要求条纹数严格递增，否则 ΔN 为 0 或负数，算出的波长没有意义
+        if np.any(np.diff(orders) <= 0):
+            QMessageBox.warning(self, "错误", "横移条纹数必须从上到下严格递增。")
+            return
+        positions = sweep_fringes(start, lamda, orders.max(), spectrum=self.spectrum())
+        if len(positions) <= orders.max():
+            # 宽带光源超出相干长度后条纹可见度太低，数不到足够的条纹
+            QMessageBox.warning(self, "错误", f"条纹可见度太低，只计数到 {len(positions)} 个条纹。")
+            return
+        fit = fit_wavelength(np.arange(len(positions)), positions)
+        self.fringe_positions = positions
+        self.fringe_fit = fit
+
+        locations = positions[orders] * 1e3
+        self.table_model1.assign(1, slice(None), locations[:5])
+        self.table_model2.assign(1, slice(None), locations[5:])
+        # 逐差法：第 i + 5 行与第 i 行相减
+        order_steps = orders[5:] - orders[:5]
+        location_steps = locations[5:] - locations[:5]
+        self.table_model3.assign(0, slice(None), [f"{high}-{low}" for high, low in zip(orders[5:], orders[:5])])
+        self.table_model3.assign(1, slice(None), location_steps)
+        self.row = 0
+        self.table_num = 0
 
+        difference_wavelength = 2 * np.mean(location_steps / order_steps) * 1e6
+        self.result_display.setText(
+            f"逐差法：λ = {difference_wavelength:.2f} nm\n"
+            f"最小二乘拟合：λ = {fit.wavelength * 1e9:.3f} ± {fit.uncertainty * 1e9:.3f} nm\n"
+            f"扫描 {SWEEP_SAMPLES} 个采样点，共计数 {len(positions)} 个条纹"
+        )
 
-    def show_message(self):
-        QMessageBox.critical(self, "错误", "缺少数据")
 
     def reset_default_settings(self):
+        self.stop_sweep()
         self.wavelength_selector.setCurrentIndex(0)
         self.slider.setValue(50)
         self.clear_data_tables()
@@ -318,14 +581,6 @@ class MichelsonInterferenceApp(QMainWindow):
         path = os.path.abspath('.')
         pass
 
-    def generate_color_map(self, wavelength):
-        COL = np.load("MyColorMap.npy")
-        xRGB = int(ceil(abs(780 - wavelength) / 2))
-        Acmx = linspace(0, COL[0][xRGB], 255)
-        Acmy = linspace(0, COL[1][xRGB], 255)
-        Acmz = linspace(0, COL[2][xRGB], 255)
-        return ListedColormap(squeeze(array([[Acmx], [Acmy], [Acmz]])).T, "mymap")
-
     def on_ring_display_label_clicked(self, event):
         print("环数显示标签被点击了")
 
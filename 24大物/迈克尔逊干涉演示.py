@@ -1,7 +1,7 @@
 import sys
 import numpy as np
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QMessageBox
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QGridLayout, QFileDialog, QLineEdit, QMessageBox, QSlider
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QFont
 import matplotlib.pyplot as plt
@@ -9,31 +9,41 @@ from matplotlib.colors import ListedColormap
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from numpy import linspace, sqrt, arctan, square, cos
 from numpy import *
+import 性能诊断
+from 颜色映射 import LUT_MIN_WAVELENGTH, LUT_MAX_WAVELENGTH, wavelength_to_map
+from 干涉网格 import RENDER_MODE, PRECISION, WorkBuffers, render_fringes, render_tilted_fringes
+from 刷新调度 import FrameScheduler, LevelOfDetail, DisplayResolution
+from 数据导出 import save_columns
 
 # 设置默认字体为黑体以支持中文显示
 plt.rcParams['font.sans-serif'] = ['SimHei']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 动镜倾角滑块的范围（角秒），1 角秒约 4.85 微弧度
+TILT_RANGE_ARCSEC = 60
+ARCSEC = np.pi / 180 / 3600
 
-def wavelength_to_map(wavelength):
+
+def intensity_vs_angle(angle_range, wavelength, distance, refractive_index):
     """
-    根据波长生成自定义颜色映射。
+    计算光强随入射角的变化：光程差 delta = 2·n·d·cos(i)，I = cos²(π·delta/λ)。
 
-    参数：
-    - wavelength：波长值。
+    整个角度数组一次向量化计算，除返回的数组外不分配新的数组。
 
-    返回：
-    - ListedColormap 对象，用于特定波长的颜色映射。
+    Args:
+        angle_range (numpy.ndarray): 入射角 i 的数组（弧度）。
+        wavelength (float): 波长 (nm)。
+        distance (float): 距离 d (mm)。
+        refractive_index (float): 折射率 n。
     """
-    COL = np.load("MyColorMap.npy")
-    xRGB = int(ceil(abs(780 - wavelength) / 2))
-    Acmx = linspace(0, COL[0][xRGB], 255)
-    Acmy = linspace(0, COL[1][xRGB], 255)
-    Acmz = linspace(0, COL[2][xRGB], 255)
-    return ListedColormap(squeeze(array([[Acmx], [Acmy], [Acmz]])).T, "mymap")
+    intensity = np.cos(angle_range)
+    np.multiply(intensity, np.pi * 2 * refractive_index * distance * 1e-3 / (wavelength * 1e-9), out=intensity)
+    np.cos(intensity, out=intensity)
+    return np.square(intensity, out=intensity)
 
 
 class MichelsonInterferenceSimulator(QMainWindow):
+    @性能诊断.timed_init("迈克尔逊干涉演示")
     def __init__(self):
         super().__init__()
 
@@ -91,7 +101,7 @@ class MichelsonInterferenceSimulator(QMainWindow):
         # 获取图片路径并设置固定大小
         current_dir = os.path.dirname(os.path.abspath(__file__))
         image_path = os.path.join(current_dir, '迈克尔逊原理图.png')
-        pixmap = QPixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
+        pixmap = 性能诊断.load_pixmap(image_path).scaled(400, 500, Qt.KeepAspectRatio)
         self.principle_img.setPixmap(pixmap)
         self.principle_img.setAlignment(Qt.AlignCenter)
         """加载实验原理图图片，设置固定大小并居中显示。"""
@@ -116,6 +126,7 @@ class MichelsonInterferenceSimulator(QMainWindow):
         self.figure, self.axs = plt.subplots(2, 1, gridspec_kw={'height_ratios': [3, 2]}, figsize=(10, 12))
         self.figure.subplots_adjust(hspace=0.5)
         self.canvas = FigureCanvas(self.figure)
+        性能诊断.watch_first_draw(self.canvas, "迈克尔逊干涉演示")
         middle_layout.addWidget(self.canvas)
         """使用 matplotlib 创建两个垂直排列的子图，设置子图高度比例、图形大小和上下间距。
         然后通过 FigureCanvas 将图形嵌入到 PyQt5 的布局中，并添加到中间布局。"""
@@ -192,12 +203,26 @@ class MichelsonInterferenceSimulator(QMainWindow):
         """创建像素输入框并设置初始值和样式。"""
         param_layout.addWidget(self.pixel_input, 4, 1)
 
+        # 动镜倾角滑块：倾角不为 0 时圆环变为等厚干涉的直条纹
+        self.tilt_sliders = []
+        for row, name in [(5, "倾角 x (角秒):"), (6, "倾角 y (角秒):")]:
+            tilt_label = QLabel(name)
+            tilt_label.setStyleSheet("font-size: 24px; border: 2px solid #7f8c8d; padding: 10px; background-color: white;")
+            param_layout.addWidget(tilt_label, row, 0)
+            tilt_slider = QSlider(Qt.Horizontal)
+            tilt_slider.setRange(-TILT_RANGE_ARCSEC, TILT_RANGE_ARCSEC)
+            tilt_slider.setValue(0)
+            param_layout.addWidget(tilt_slider, row, 1)
+            self.tilt_sliders.append(tilt_slider)
+        self.tilt_x_slider, self.tilt_y_slider = self.tilt_sliders
+        """创建 x、y 两个方向的倾角滑块，范围为 ±TILT_RANGE_ARCSEC 角秒。"""
+
         # 计算结果按钮
         self.calculate_button = QPushButton("计算结果")
         self.calculate_button.setStyleSheet("font-size: 24px; background-color: #007bff; color: white;")
         self.calculate_button.clicked.connect(self.calculate_results)
         """设置计算结果按钮的样式，并连接到计算结果方法。"""
-        param_layout.addWidget(self.calculate_button, 5, 0, 1, 2)
+        param_layout.addWidget(self.calculate_button, 7, 0, 1, 2)
 
         # 提前预留空间的结果显示部分
         self.result_display = QLabel("\n\n\n\n\n\n\n\n\n\n\n\n结果显示:\n干涉条纹：")
@@ -258,6 +283,30 @@ class MichelsonInterferenceSimulator(QMainWindow):
         self.default_refractive_index = 1.00
         self.default_pixel = 400
         self.default_angle_range = np.linspace(0, 2 * np.pi, 300)
+        self.angle_range = self.default_angle_range
+        self.interference_intensity = intensity_vs_angle(self.angle_range, self.default_wavelength, self.default_distance,
+                                                         self.default_refractive_index)
+        # 干涉图的渲染方式，默认用径向剖面渲染圆环
+        self.render_mode = RENDER_MODE
+        # 计算精度（可改为 np.float64）和每次计算复用的工作数组
+        self.precision = PRECISION
+        self.work_buffers = WorkBuffers()
+        # 干涉图网格每边的点数与它在屏幕上的物理像素数一致，画布尺寸改变时重新渲染
+        self.resolution = DisplayResolution(self.canvas, self.axs[0], self.on_display_resize)
+        self.fringe_image = None
+        self.profile_line = None
+
+        # 修改参数时实时预览：输入过程中按降采样的网格渲染，停顿后补画全分辨率的一帧
+        self.frame_scheduler = FrameScheduler(self.preview_simulation, "迈克尔逊干涉演示/参数刷新", parent=self)
+        self.detail = LevelOfDetail(self.frame_scheduler.flush, "迈克尔逊干涉演示/细节层次", parent=self)
+        for line_edit in [self.wavelength_input, self.screen_width_input, self.distance_input, self.refractive_index_input]:
+            line_edit.textEdited.connect(self.detail.touch)
+            line_edit.textEdited.connect(self.frame_scheduler.request)
+        for tilt_slider in self.tilt_sliders:
+            self.detail.attach(tilt_slider)
+            tilt_slider.valueChanged.connect(self.frame_scheduler.request)
+        """参数输入框的每次编辑和倾角滑块的拖动都交给刷新调度器合并，快速连续变化时降低分辨率。"""
+
         self.calculate_and_display(self.default_angle_range, self.default_wavelength, self.default_distance, self.default_refractive_index)
 
     def calculate_results(self):
@@ -277,12 +326,15 @@ class MichelsonInterferenceSimulator(QMainWindow):
             distance = float(self.distance_input.text()) if self.distance_input.text() else 0
             refractive_index = float(self.refractive_index_input.text()) if self.refractive_index_input.text() else 0
             pixel = float(self.pixel_input.text()) if self.pixel_input.text() else 0
+            if not LUT_MIN_WAVELENGTH <= selected_wavelength <= LUT_MAX_WAVELENGTH:
+                QMessageBox.warning(self, "错误", f"波长应在 {LUT_MIN_WAVELENGTH:.0f}–{LUT_MAX_WAVELENGTH:.0f} nm 之间。")
+                return
 
             # 使用默认的角度范围
             self.angle_range = np.linspace(0, 2 * np.pi, 300)
 
-            # 临时随机生成强度值（此处应该替换为实际的计算逻辑）
-            self.interference_intensity = np.random.rand(len(self.angle_range))
+            # 光强随入射角的变化：delta = 2·n·d·cos(i)
+            self.interference_intensity = intensity_vs_angle(self.angle_range, selected_wavelength, distance, refractive_index)
 
             # 更新结果显示文本
             self.result_display.setText(
@@ -295,6 +347,28 @@ class MichelsonInterferenceSimulator(QMainWindow):
             # 如果输入不是有效的数字，弹出错误提示框
             QMessageBox.warning(self, "错误", "请输入有效的数字。")
 
+    def on_display_resize(self):
+        """画布尺寸改变后按新的像素数重新渲染。"""
+        self.frame_scheduler.request()
+
+    def preview_simulation(self):
+        """
+        按输入框中的当前参数刷新干涉图，供实时预览使用。
+
+        输入不完整（如正在输入的数字，"532" 输到一半时的 "5"、"53"）时保持上一帧，不弹出错误提示。
+        """
+        try:
+            wavelength = float(self.wavelength_input.text())
+            # 屏宽由 calculate_and_display 读取，这里只检查取值
+            screen_width = float(self.screen_width_input.text() or 0)
+            distance = float(self.distance_input.text()) if self.distance_input.text() else 0
+            refractive_index = float(self.refractive_index_input.text()) if self.refractive_index_input.text() else 0
+        except ValueError:
+            return
+        if not LUT_MIN_WAVELENGTH <= wavelength <= LUT_MAX_WAVELENGTH or screen_width <= 0 or distance <= 0:
+            return
+        self.calculate_and_display(self.default_angle_range, wavelength, distance, refractive_index)
+
     def calculate_and_display(self, angle_range, wavelength, distance, refractive_index):
         """
         计算并显示模拟结果。
@@ -317,35 +391,48 @@ class MichelsonInterferenceSimulator(QMainWindow):
         d = distance * 1e-3
         # 将屏宽转换为米
         x_lim = screen_width * 1e-3
-        # 设定网格点数
-        N = 500
+        # 设定网格点数，实时预览的输入过程中降采样
+        N = self.detail.grid_size(self.resolution.size)
         # 生成位置数组
         x = np.linspace(-x_lim, x_lim, N)
-        # 创建二维网格
-        [X, Y] = np.meshgrid(x, x)
-        # 计算到中心的距离
-        r = np.sqrt(np.square(X) + np.square(Y))
-        # 计算弧度值
-        i = np.arctan(np.sqrt(np.square(r)))
-        # 计算光程差
-        delta = 2 * refractive_index * d * np.cos(i)
-        # 计算波矢差
-        k = np.pi * delta / lamda
-        # 计算光强
-        I0 = np.square(np.cos(k))
+        # 计算光强：i = arctan(r)，光程差 2·n·d·cos(i)，I0 = cos²(π·光程差/λ)，网格由各窗口共享缓存
+        # 动镜倾斜时光程差再加上 2·(a·x + b·y)，条纹变为等厚干涉的直条纹
+        tilt_x = self.tilt_x_slider.value() * ARCSEC
+        tilt_y = self.tilt_y_slider.value() * ARCSEC
+        buffer = self.work_buffers.get("intensity", (N, N), self.precision)
+        if tilt_x or tilt_y:
+            I0 = render_tilted_fringes(N, x_lim, 1.0, refractive_index * d, tilt_x, tilt_y, lamda, out=buffer)
+            self.axs[0].set_title("等厚干涉图", fontsize=20)
+        else:
+            I0 = render_fringes(N, x_lim, 1.0, refractive_index * d, lamda, self.render_mode, out=buffer)
+            self.axs[0].set_title("等倾干涉图", fontsize=20)
         # 根据波长获取颜色映射
         my_cmap = wavelength_to_map(wavelength)
         # 在第一个子图中绘制干涉条纹图像
-        self.axs[0].imshow(2 * I0, cmap=my_cmap, interpolation='bessel', origin='lower', vmin=0, vmax=1)
-        self.axs[0].axis('off')
+        image = np.multiply(I0, 2, out=self.work_buffers.get("image", (N, N), self.precision))
+        # 图像对象只创建一次，之后替换数据；extent 与网格点数无关，不同分辨率的图像铺满同一区域
+        extent = (0, 1, 0, 1)
+        if self.fringe_image is None:
+            self.fringe_image = self.axs[0].imshow(image, cmap=my_cmap, interpolation='nearest', origin='lower',
+                                                   vmin=0, vmax=1, extent=extent)
+            self.axs[0].axis('off')
+        else:
+            self.fringe_image.set_data(image)
+            self.fringe_image.set_cmap(my_cmap)
 
         # 绘制光强分布图
-        I = I0[:, int(N / 2)]
+        I = I0[:, int(N / 2)].copy()
         self.axs[1].set_title("光强分布图", fontsize=20)
         self.axs[1].set_xlabel("位置", fontsize=18)
         self.axs[1].set_ylabel("光强", fontsize=18)
-        # 在第二个子图中绘制光强随位置的变化曲线
-        self.axs[1].plot(x, I, color=my_cmap.colors[-1], linewidth=1.5)
+        # 在第二个子图中绘制光强随位置的变化曲线，曲线只创建一次
+        if self.profile_line is None:
+            self.profile_line, = self.axs[1].plot(x, I, color=my_cmap.colors[-1], linewidth=1.5)
+        else:
+            self.profile_line.set_data(x, I)
+            self.profile_line.set_color(my_cmap.colors[-1])
+            self.axs[1].relim()
+            self.axs[1].autoscale_view()
         labels = self.axs[1].get_xticklabels() + self.axs[1].get_yticklabels()
         [label.set_fontname('Times New Roman') for label in labels]
         self.canvas.draw()
@@ -385,19 +472,17 @@ class MichelsonInterferenceSimulator(QMainWindow):
         """
         保存实验数据。
 
-        弹出文件保存对话框，获取用户指定的文件名，将角度和干涉条纹强度数据保存为文本文件。
+        弹出文件保存对话框，获取用户指定的文件名，将角度和干涉条纹强度数据按列批量保存，
+        支持文本、CSV 和 NumPy (.npz) 格式。
         """
         options = QFileDialog.Options()
         # 获取用户指定的文件名
-        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "", "Text Files (*.txt);;All Files (*)",
+        file_name, _ = QFileDialog.getSaveFileName(self, "保存实验数据", "",
+                                                   "Text Files (*.txt);;CSV Files (*.csv);;NumPy Files (*.npz);;All Files (*)",
                                                    options=options)
         if file_name:
-            with open(file_name, 'w') as file:
-                # 写入文件头
-                file.write("角度, 干涉条纹强度\n")
-                for i in range(len(self.interference_intensity)):
-                    # 写入角度和干涉条纹强度数据
-                    file.write(f"{self.angle_range[i]:.2f}, {self.interference_intensity[i]:.2f}\n")
+            # 文本格式与原来相同，保留两位小数
+            save_columns(file_name, ["角度", "干涉条纹强度"], [self.angle_range, self.interference_intensity], fmt="%.2f")
 
 
 # 应用程序启动入口
@@ -0,0 +1,170 @@
+import os
+import threading
+from functools import lru_cache
+import numpy as np
+from numpy import linspace, ceil, squeeze, array
+import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap
+import 性能诊断
+
+# 颜色表与本文件放在同一目录，不依赖当前工作目录
+COLOR_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MyColorMap.npy")
+
+# 最多缓存多少个波长的颜色映射
+COLOR_MAP_CACHE_SIZE = 64
+
+_color_table = None
+_color_table_lock = threading.Lock()
+
+
+def color_table():
+    """
+    返回 MyColorMap.npy 中的颜色表（3 × 201，对应 780 nm 到 380 nm，步长 2 nm）。
+
+    整个进程只加载一次，并以只读内存映射的方式打开。
+    """
+    global _color_table
+    if _color_table is None:
+        with _color_table_lock:
+            if _color_table is None:
+                with 性能诊断.timed(性能诊断.ASSETS, "MyColorMap.npy"):
+                    _color_table = np.load(COLOR_MAP_PATH, mmap_mode='r')
+    return _color_table
+
+
+@lru_cache(maxsize=COLOR_MAP_CACHE_SIZE)
+def wavelength_to_map(wavelength):
+    """
+    根据波长生成自定义颜色映射。
+
+    同一波长的颜色映射只生成一次，之后直接从缓存返回，返回的对象不要修改。
+
+    参数：
+    - wavelength：波长值 (nm)。
+
+    返回：
+    - ListedColormap 对象，用于特定波长的颜色映射。
+
+    颜色表只覆盖 380–780 nm，超出范围时抛出 ValueError。
+    """
+    if not LUT_MIN_WAVELENGTH <= wavelength <= LUT_MAX_WAVELENGTH:
+        raise ValueError(f"波长 {wavelength} nm 超出可见光范围 {LUT_MIN_WAVELENGTH:.0f}–{LUT_MAX_WAVELENGTH:.0f} nm")
+    COL = color_table()
+    xRGB = int(ceil(abs(780 - wavelength) / 2))
+    Acmx = linspace(0, COL[0][xRGB], 255)
+    Acmy = linspace(0, COL[1][xRGB], 255)
+    Acmz = linspace(0, COL[2][xRGB], 255)
+    return ListedColormap(squeeze(array([[Acmx], [Acmy], [Acmz]])).T, "mymap")
+
+
+@lru_cache(maxsize=None)
+def transparent_colormap(name='viridis'):
+    """
+    返回把纯白色设为透明的 matplotlib 颜色映射。
+
+    每种颜色映射在整个进程中只生成一次，返回的对象不要修改。
+    """
+    cmap = plt.get_cmap(name)
+    colors = cmap(np.arange(cmap.N))
+    colors[:, -1] = np.where(np.all(colors[:, :-1] == 1, axis=-1), 0, 1)  # 将白色区域的alpha设为0
+    return ListedColormap(colors)
+
+
+# 可见光波段查找表：380–780 nm，分辨率 0.1 nm
+LUT_MIN_WAVELENGTH = 380.0
+LUT_MAX_WAVELENGTH = 780.0
+LUT_RESOLUTION = 0.1
+
+
+def _wavelength_to_rgb_exact(wavelengths):
+    """
+    按分段公式把波长 (nm) 转换为 RGB，输入任意形状的数组，输出形状为 (..., 3)，取值 0–1。
+
+    分段与原来逐点计算的 wavelength2Hex 一致，可见光以外返回黑色。
+    """
+    w = np.asarray(wavelengths, dtype=np.float64)
+    conditions = [
+        (380 <= w) & (w <= 440),
+        (440 <= w) & (w <= 490),
+        (490 <= w) & (w <= 510),
+        (510 <= w) & (w <= 580),
+        (580 <= w) & (w <= 645),
+        (645 <= w) & (w <= 780),
+    ]
+
+    # np.select 会计算所有分支，先把底数截到非负，避免区间外出现 NaN
+    def power(base):
+        return np.clip(base, 0, None) ** 0.8
+
+    attenuation_violet = 0.3 + 0.7 * (w - 380) / (440 - 380)
+    attenuation_red = 0.3 + 0.7 * (750 - w) / (750 - 645)
+    zero = np.zeros_like(w)
+    one = np.ones_like(w)
+    r = np.select(conditions, [power(-(w - 440) / (440 - 380) * attenuation_violet), zero, zero,
+                               power((w - 510) / (580 - 510)), one, attenuation_red], 0.0)
+    g = np.select(conditions, [zero, power((w - 440) / (490 - 440)), one, one,
+                               power(-(w - 645) / (645 - 580)), zero], 0.0)
+    b = np.select(conditions, [power(attenuation_violet), one, power(-(w - 510) / (510 - 490)),
+                               zero, zero, zero], 0.0)
+    return np.stack([r, g, b], axis=-1)
+
+
+LUT_WAVELENGTHS = np.round(np.arange(LUT_MIN_WAVELENGTH, LUT_MAX_WAVELENGTH + LUT_RESOLUTION / 2, LUT_RESOLUTION), 1)
+WAVELENGTH_RGB_LUT = _wavelength_to_rgb_exact(LUT_WAVELENGTHS)
+WAVELENGTH_RGB_LUT.setflags(write=False)
+
+
+def wavelength_to_rgb(wavelengths):
+    """
+    把波长 (nm) 批量转换为 RGB，输出形状为 (..., 3)，取值 0–1，结果与分段公式完全相同。
+
+    恰好落在 0.1 nm 网格上的波长（滑块和下拉框给出的都是）直接查表，
+    其余波长按分段公式向量化计算，不做最近邻取整；380–780 nm 以外返回黑色。
+    """
+    w = np.asarray(wavelengths, dtype=np.float64)
+    index = np.rint((w - LUT_MIN_WAVELENGTH) / LUT_RESOLUTION)
+    in_table = (index >= 0) & (index < len(WAVELENGTH_RGB_LUT))
+    index = np.where(in_table, index, 0).astype(np.intp)
+    on_grid = in_table & (LUT_WAVELENGTHS[index] == w)
+    rgb = WAVELENGTH_RGB_LUT[index]
+    if not on_grid.all():
+        rgb[~on_grid] = _wavelength_to_rgb_exact(w[~on_grid])
+    return rgb
+
+
+def wavelength_to_hex(wavelengths):
+    """
+    把波长 (nm) 批量转换为 '#rrggbb' 颜色字符串，输入为标量时返回单个字符串。
+    """
+    rgb = (wavelength_to_rgb(wavelengths) * 255).astype(np.uint8)
+    packed = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+    if packed.ndim == 0:
+        return f'#{int(packed):06x}'
+    return np.char.mod('#%06x', packed)
+
+
+@lru_cache(maxsize=COLOR_MAP_CACHE_SIZE)
+def wavelength_lut(wavelength):
+    """返回 wavelength_to_map(wavelength) 的 uint8 RGBA 查找表，形状为 (颜色数, 4)。"""
+    cmap = wavelength_to_map(wavelength)
+    lut = cmap(np.arange(cmap.N), bytes=True)
+    lut.setflags(write=False)
+    return lut
+
+
+def apply_wavelength_map(values, wavelength, out=None, index=None):
+    """
+    把 0–1 之间的光强映射为 uint8 RGBA 图像，结果与
+    wavelength_to_map(wavelength)(values, bytes=True) 相同。
+
+    给出 out（形状 (..., 4) 的 uint8 数组）和 index（与 values 同形状的整数工作数组）时
+    不分配新数组。
+    """
+    lut = wavelength_lut(wavelength)
+    n = len(lut)
+    if index is None:
+        index = np.empty(np.shape(values), np.intp)
+    # 与 matplotlib 相同：乘以颜色数后截断取整，1.0 落在最后一个颜色上
+    np.multiply(values, n, out=index, casting='unsafe')
+    np.clip(index, 0, n - 1, out=index)
+    return np.take(lut, index, axis=0, out=out, mode='clip')